@@ -0,0 +1,265 @@
+"""Offline end-to-end benchmark of the whole workflow: main() against a fake LLM and a fake Telegram.
+
+Each run is a fresh process (clean module state, empty caches and translation memory in a
+temporary directory) that registers benchmarks/fake_llm_provider.py with LiteLLM, starts
+benchmarks/fake_telegram_server.py and calls financial_bot.main(). Reported per run:
+  * wall and CPU time of main(), peak RSS (and the Python heap peak with --tracemalloc)
+  * per stage, from the run timeline: wall time, fake LLM time, rate-limit waits, Telegram
+    I/O and the remaining framework overhead (CrewAI, parsing, formatting, queueing)
+  * LLM calls and Telegram messages
+The medians are appended to --results together with the configuration and git commit,
+and compared with the last stored result for the same configuration.
+
+Usage: python benchmarks/benchmark_e2e.py --runs 3 --ttft 0.3 --tps 200 --chats 2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import statistics
+import subprocess
+import tracemalloc
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(BENCHMARKS)
+sys.path.insert(0, REPO)
+sys.path.insert(0, BENCHMARKS)
+
+RESULT_MARKER = 'E2E_RESULT '
+DEFAULT_RESULTS = os.path.join(REPO, 'state', 'benchmarks', 'e2e.jsonl')
+
+
+def add_config_arguments(parser):
+    parser.add_argument('--ttft', type=float, default=0.3, help='fake LLM seconds to first token')
+    parser.add_argument('--tps', type=float, default=200.0, help='fake LLM completion tokens per second')
+    parser.add_argument('--tokens', type=int, default=0, help='pad research/analysis replies to this many tokens')
+    parser.add_argument('--chats', type=int, default=1, help='Telegram chats to broadcast to')
+    parser.add_argument('--telegram-latency', type=float, default=0.02, help='fake Telegram seconds per request')
+    parser.add_argument('--rate-limit-delay', type=float, default=0.2, help='RATE_LIMIT_DELAY for the fake provider')
+    parser.add_argument('--stream', choices=['true', 'false'], default='true', help='STREAM_SUMMARY')
+    # Set by benchmarks/load_test.py so concurrent pipelines share one server and one provider quota
+    parser.add_argument('--telegram-url', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--rate-limit-db', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--chat-offset', type=int, default=0, help=argparse.SUPPRESS)
+
+
+CONFIG_KEYS = ('ttft', 'tps', 'tokens', 'chats', 'telegram_latency', 'rate_limit_delay', 'stream')
+
+
+def worker_environment(args):
+    """Configuration of a measured run. Repo modules read it at import time, so it has to be in
+    the worker's environment before the first of them (fake_llm_provider included) is imported."""
+    environment = {
+        'PERPLEXITY_API_KEY': 'fake-key',
+        'TELEGRAM_BOT_TOKEN': '123456:fake-token',
+        'TELEGRAM_CHAT_ID': ','.join(str(1000 + args.chat_offset + index) for index in range(args.chats)),
+        'TELEGRAM_HTTP2': 'false',
+        'LLM_PROVIDER': 'fakellm',
+        'MODEL_NAME': 'sonar-fake',
+        'RATE_LIMIT_DELAY': str(args.rate_limit_delay),
+        'RATE_LIMIT_MIN_DELAY': str(min(args.rate_limit_delay, 1.0)),
+        'STREAM_SUMMARY': args.stream,
+        'LLM_CACHE_ENABLED': 'false',
+        'TRACE_EXPORTER': 'none',
+        'CREWAI_DISABLE_TELEMETRY': 'true',
+        'OTEL_SDK_DISABLED': 'true',
+    }
+    if args.telegram_url:
+        environment['TELEGRAM_API_BASE'] = args.telegram_url
+    if args.rate_limit_db:
+        environment.update(RATE_LIMIT_BACKEND='sqlite', RATE_LIMIT_DB=args.rate_limit_db)
+    return environment
+
+
+def check_configuration(args):
+    """Fail loudly if the imported modules did not pick up the configuration being measured"""
+    from rate_limiter import rate_limiters, SharedTokenBucket
+
+    bucket = rate_limiters.bucket('fakellm')
+    if abs(bucket.rate * args.rate_limit_delay - 1) > 1e-6:
+        raise SystemExit(f'Worker paces the fake provider at {bucket.rate:.4f} req/s, '
+                         f'not 1/{args.rate_limit_delay}s: the environment was set too late')
+    if args.rate_limit_db and not isinstance(bucket, SharedTokenBucket):
+        raise SystemExit(f'Worker uses a per-process {type(bucket).__name__}, '
+                         f'not the provider quota shared through {args.rate_limit_db}')
+
+
+def run_worker(args):
+    """One measured run of main() in this process; prints a RESULT_MARKER line with JSON"""
+    import tempfile
+
+    os.environ.update(worker_environment(args), RUN_ID=f'e2e-{os.getpid()}')
+    from fake_telegram_server import start_server
+    from fake_llm_provider import register
+
+    # Relative state paths (queue, caches, memory, checkpoints) land in a fresh directory
+    os.chdir(tempfile.mkdtemp(prefix='financial-bot-e2e-'))
+    server, telegram_state = None, None
+    if not args.telegram_url:
+        server, telegram_state, base_url = start_server(latency=args.telegram_latency)
+        os.environ['TELEGRAM_API_BASE'] = base_url
+    fake_llm = register(ttft=args.ttft, tps=args.tps, tokens=args.tokens)
+
+    started = time.perf_counter()
+    import financial_bot
+    from run_timeline import timeline
+    import_seconds = time.perf_counter() - started
+    check_configuration(args)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    wall_started, cpu_started = time.perf_counter(), time.process_time()
+    success = financial_bot.main()
+    wall, cpu = time.perf_counter() - wall_started, time.process_time() - cpu_started
+    python_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+    if server is not None:
+        server.shutdown()
+
+    stages = timeline.breakdown()
+    result = {
+        'success': bool(success),
+        'wall_seconds': round(wall, 3),
+        'cpu_seconds': round(cpu, 3),
+        'import_seconds': round(import_seconds, 3),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'python_peak_mb': round(python_peak / 2 ** 20, 1) if python_peak is not None else None,
+        'overhead_seconds': round(sum(stage['overhead'] for stage in stages.values()), 3),
+        'stages': stages,
+        'totals': timeline.totals(),
+        'llm_calls': fake_llm.calls,
+        'telegram_messages': len(telegram_state.messages) if telegram_state else None,
+        'telegram_stats': dict(telegram_state.stats) if telegram_state else None,
+    }
+    print(RESULT_MARKER + json.dumps(result), flush=True)
+
+
+def worker_command(args, *extra):
+    """Command line of one measured run with the configuration in args"""
+    command = [sys.executable, os.path.abspath(__file__), '--worker']
+    for key in CONFIG_KEYS:
+        command += [f"--{key.replace('_', '-')}", str(getattr(args, key))]
+    if getattr(args, 'tracemalloc', False):
+        command.append('--tracemalloc')
+    return command + list(extra)
+
+
+def parse_worker_output(stdout):
+    """The result JSON a worker printed, or None"""
+    for line in reversed(stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    return None
+
+
+def run_once(args):
+    completed = subprocess.run(worker_command(args), capture_output=True, text=True, timeout=args.timeout,
+                               env={**os.environ, **worker_environment(args)})
+    if args.verbose:
+        print(completed.stdout)
+    result = parse_worker_output(completed.stdout)
+    if result is not None:
+        return result
+    print(completed.stdout[-3000:])
+    print(completed.stderr[-3000:], file=sys.stderr)
+    raise SystemExit(f'Benchmark run failed (exit code {completed.returncode})')
+
+
+def median_result(results):
+    """Median of every numeric measurement over the runs, per stage too"""
+    median = {}
+    for key in ('wall_seconds', 'cpu_seconds', 'import_seconds', 'peak_rss_mb', 'python_peak_mb',
+                'overhead_seconds', 'llm_calls', 'telegram_messages'):
+        values = [result[key] for result in results if result.get(key) is not None]
+        median[key] = round(statistics.median(values), 3) if values else None
+    median['stages'] = {}
+    for stage in results[0]['stages']:
+        samples = [result['stages'][stage] for result in results if stage in result['stages']]
+        median['stages'][stage] = {name: round(statistics.median(sample[name] for sample in samples), 3)
+                                   for name in samples[0]}
+    return median
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_result(path, config):
+    if not os.path.exists(path):
+        return None
+    previous = None
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('config') == config:
+                previous = record
+    return previous
+
+
+def change(current, before):
+    if current is None or not before:
+        return ''
+    return f' ({(current - before) / before:+.1%} vs {before:g})'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_config_arguments(parser)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--tracemalloc', action='store_true', help='also measure the Python heap peak (slower)')
+    parser.add_argument('--results', default=DEFAULT_RESULTS, help='JSONL file the results are appended to')
+    parser.add_argument('--label', default='', help='note stored with the results')
+    parser.add_argument('--timeout', type=float, default=600, help='seconds per run')
+    parser.add_argument('--verbose', action='store_true', help="show each run's console output")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        return run_worker(args)
+
+    config = {key: getattr(args, key) for key in CONFIG_KEYS}
+    print(f"🧪 End-to-end benchmark: {args.runs} runs, {json.dumps(config)}")
+    results = []
+    for index in range(args.runs):
+        result = run_once(args)
+        results.append(result)
+        status = '✅' if result['success'] else '❌'
+        print(f"   {status} run {index + 1}: {result['wall_seconds']:.2f}s wall, {result['cpu_seconds']:.2f}s CPU, "
+              f"{result['peak_rss_mb']:.0f} MB peak RSS, {result['llm_calls']} LLM calls, "
+              f"{result['telegram_messages']} Telegram messages")
+
+    median = median_result(results)
+    before = previous_result(args.results, config)
+    before_median = before['median'] if before else {}
+    print(f"⏱️ Median wall {median['wall_seconds']:.2f}s{change(median['wall_seconds'], before_median.get('wall_seconds'))}")
+    print(f"🧮 Median CPU {median['cpu_seconds']:.2f}s{change(median['cpu_seconds'], before_median.get('cpu_seconds'))}")
+    print(f"💾 Median peak RSS {median['peak_rss_mb']:.0f} MB"
+          f"{change(median['peak_rss_mb'], before_median.get('peak_rss_mb'))}")
+    if median['python_peak_mb'] is not None:
+        print(f"🐍 Median Python heap peak {median['python_peak_mb']:.1f} MB")
+    print(f"⚙️ Framework overhead {median['overhead_seconds']:.2f}s"
+          f"{change(median['overhead_seconds'], before_median.get('overhead_seconds'))}")
+    for stage, seconds in median['stages'].items():
+        print(f"   {stage}: {seconds['wall']:.2f}s = LLM {seconds['llm']:.2f}s + rate-limit wait "
+              f"{seconds['rate_limit']:.2f}s + Telegram {seconds['telegram']:.2f}s + "
+              f"overhead {seconds['overhead']:.2f}s")
+
+    directory = os.path.dirname(args.results)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    record = {'timestamp': time.time(), 'commit': git_commit(), 'label': args.label, 'config': config,
+              'median': median, 'runs': results}
+    with open(args.results, 'a', encoding='utf-8') as handle:
+        handle.write(json.dumps(record) + '\n')
+    print(f"🗂️ Results appended to {args.results}")
+
+
+if __name__ == '__main__':
+    main()
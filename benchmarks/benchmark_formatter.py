@@ -0,0 +1,60 @@
+"""Latency of the local report formatter vs. the LLM formatting step it replaces.
+
+Formats a sample analyst report (Markdown with citations, the shape sonar-pro returns)
+with report_formatter.format_report, checks the result with the stand-in server's
+Telegram HTML validator and prints the per-call cost next to what the old
+formatting_agent cost per run: one LLM round trip (--llm-seconds, ~2.5s for this step in
+financial_crew.log) plus one request slot of the provider's rate limit.
+
+Usage: python benchmarks/benchmark_formatter.py --iterations 2000 --sections 4
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_formatter import format_report
+from rate_limiter import RATE_LIMIT_DELAY
+
+from fake_telegram_server import html_error
+from sample_reports import SAMPLE_REPORT
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--sections', type=int, default=1, help='report length multiplier')
+    parser.add_argument('--llm-seconds', type=float, default=2.5,
+                        help='observed latency of the LLM formatting step being replaced')
+    parser.add_argument('--rate-limit-delay', type=float, default=RATE_LIMIT_DELAY,
+                        help='seconds per request slot of the LLM provider (RATE_LIMIT_DELAY)')
+    args = parser.parse_args()
+
+    report = SAMPLE_REPORT * args.sections
+    formatted = format_report(report)
+    error = html_error(formatted)
+    print(f"🧾 Input {len(report)} chars -> {len(formatted)} chars of Telegram HTML "
+          f"({'valid' if error is None else error})")
+
+    samples = []
+    for _ in range(args.iterations):
+        started = time.perf_counter()
+        format_report(report)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    mean = statistics.fmean(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"⚡ format_report: mean {mean * 1e6:.0f}µs, median {samples[len(samples) // 2] * 1e6:.0f}µs, "
+          f"p99 {p99 * 1e6:.0f}µs over {args.iterations} runs")
+
+    saved = args.llm_seconds + args.rate_limit_delay
+    print(f"🐢 LLM formatting step: {args.llm_seconds:.1f}s round trip + {args.rate_limit_delay:.1f}s rate-limit slot")
+    print(f"⏱️ Saved per run: ~{saved - mean:.2f}s ({saved / mean:,.0f}x faster), "
+          "one fewer LLM call against the provider quota")
+
+
+if __name__ == '__main__':
+    main()
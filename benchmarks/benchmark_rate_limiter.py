@@ -0,0 +1,77 @@
+"""Aggregate throughput of N bot processes drawing from the LLM rate limiter.
+
+With the in-memory backend every process has its own budget, so aggregate
+throughput grows with N and overshoots the provider quota. With the SQLite
+backend all processes share one budget and the aggregate stays at the
+configured rate regardless of N.
+
+Usage: python benchmarks/benchmark_rate_limiter.py --processes 1 2 4 8 --rate 20
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limiter import RateLimiterRegistry
+
+
+def worker(backend, db_path, rate, burst, duration, start_at, results):
+    registry = RateLimiterRegistry(default_rate=rate, default_capacity=burst, backend=backend, db_path=db_path)
+    bucket = registry.bucket('benchmark')
+    while time.time() < start_at:
+        time.sleep(0.001)
+    deadline = start_at + duration
+    acquired = 0
+    while True:
+        wait_time = bucket.reserve()
+        if time.time() + wait_time > deadline:
+            break
+        if wait_time > 0:
+            time.sleep(wait_time)
+        acquired += 1
+    results.put(acquired)
+
+
+def run(backend, processes, rate, burst, duration):
+    db_path = os.path.join(tempfile.mkdtemp(prefix='rate_limit_bench_'), 'rate_limits.db')
+    # Create the shared row up front so every worker starts from the same full bucket
+    RateLimiterRegistry(default_rate=rate, default_capacity=burst, backend=backend, db_path=db_path).bucket('benchmark')
+    results = multiprocessing.Queue()
+    start_at = time.time() + 0.5
+    workers = [
+        multiprocessing.Process(target=worker, args=(backend, db_path, rate, burst, duration, start_at, results))
+        for _ in range(processes)
+    ]
+    for process in workers:
+        process.start()
+    total = sum(results.get() for _ in workers)
+    for process in workers:
+        process.join()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--rate', type=float, default=20.0, help='configured requests per second')
+    parser.add_argument('--burst', type=int, default=5)
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per measurement')
+    parser.add_argument('--backends', nargs='+', default=['memory', 'sqlite'])
+    args = parser.parse_args()
+
+    allowed = args.rate * args.duration + args.burst
+    print(f"Configured budget: {args.rate:.1f} req/s, burst {args.burst}, {args.duration:.0f}s window "
+          f"(max {allowed:.0f} requests)")
+    print(f"{'backend':<8} {'procs':>5} {'requests':>9} {'req/s':>8} {'x budget':>9}")
+    for backend in args.backends:
+        for processes in args.processes:
+            total = run(backend, processes, args.rate, args.burst, args.duration)
+            print(f"{backend:<8} {processes:>5} {total:>9} {total / args.duration:>8.1f} {total / allowed:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
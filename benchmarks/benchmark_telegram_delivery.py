@@ -0,0 +1,109 @@
+"""Telegram delivery throughput and retry behaviour against the local stand-in server.
+
+Starts benchmarks/fake_telegram_server.py in-process, renders a sample report per
+language once, fans it out to N chats and delivers it with TelegramDispatcher.
+Reports throughput, attempts per message, server-side 429/400 counts and the
+connection timing of the pooled client. --baseline also measures the old
+sequential send with a fixed sleep after each message.
+
+Usage: python benchmarks/benchmark_telegram_delivery.py --chats 50 --latency 0.05 --inject-429 0.05
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import urllib.request
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from broadcast import ChatTarget, fan_out, broadcast_summary
+from telegram_client import TelegramClient
+from telegram_dispatcher import TelegramDispatcher, OutgoingMessage
+from telegram_html import chunk_html
+
+from fake_telegram_server import start_server
+
+LANGUAGES = ['English', 'Arabic', 'Hindi', 'Hebrew']
+SAMPLE_SECTION = (
+    "<b>📈 MARKET OVERVIEW</b>\n"
+    "The S&amp;P 500 closed <i>+0.85%</i> at <i>5,648.40</i> while the Nasdaq gained <i>+1.13%</i>. "
+    "Breadth was positive with advancers leading decliners 2:1.\n\n"
+    "<b>📊 KEY MOVERS &amp; CATALYSTS</b>\n"
+    "Nvidia rose <i>+4.2%</i> on data-center demand; Tesla fell <i>-3.1%</i> after delivery guidance.\n\n"
+    "<b>💡 MARKET IMPLICATIONS</b>\n"
+    "Momentum favours large-cap tech; watch Thursday's CPI print for rate-path repricing.\n\n"
+)
+
+
+def render(sections):
+    rendered = []
+    for language in LANGUAGES:
+        chunks = chunk_html(SAMPLE_SECTION * sections, 3900)
+        for index, chunk in enumerate(chunks):
+            rendered.append(OutgoingMessage(None, f'<b>🔹 {language}</b>\n\n{chunk}', language=language,
+                                            chunk_index=index, chunk_count=len(chunks), run_id='benchmark'))
+    return rendered
+
+
+def server_stats(base_url):
+    with urllib.request.urlopen(f'{base_url}/stats') as response:
+        return json.load(response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chats', type=int, default=20)
+    parser.add_argument('--sections', type=int, default=1, help='report length multiplier (>8 forces chunking)')
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--inject-429', type=float, default=0.0)
+    parser.add_argument('--chat-limit', type=int, default=3, help='server: messages per chat per second')
+    parser.add_argument('--global-limit', type=int, default=30, help='server: messages per second overall')
+    parser.add_argument('--chat-rate', type=float, default=1.0, help='client: per-chat pacing (msg/s)')
+    parser.add_argument('--global-rate', type=float, default=30.0, help='client: global pacing (msg/s)')
+    parser.add_argument('--baseline', action='store_true', help='also time sequential sends with a fixed sleep')
+    parser.add_argument('--baseline-sleep', type=float, default=3.0)
+    args = parser.parse_args()
+
+    _, _, base_url = start_server(
+        latency=args.latency, jitter=args.jitter, chat_limit=args.chat_limit, global_limit=args.global_limit,
+        inject_429=args.inject_429, seed=42
+    )
+    client = TelegramClient('BENCHMARK', base_url=base_url, http2=False)
+    dispatcher = TelegramDispatcher(client, global_rate=args.global_rate, chat_rate=args.chat_rate)
+
+    targets = [ChatTarget(-1000000 - i) for i in range(args.chats)]
+    rendered = render(args.sections)
+    messages = fan_out(rendered, targets)
+    print(f"📦 {len(rendered)} rendered chunks x {len(targets)} chats = {len(messages)} messages "
+          f"(server latency {args.latency * 1000:.0f}ms, 429 injection {args.inject_429:.0%})")
+
+    started = time.perf_counter()
+    report = dispatcher.dispatch_sync(messages)
+    elapsed = time.perf_counter() - started
+    print(broadcast_summary(report, targets))
+    attempts = Counter(r.attempts for r in report.results)
+    print(f"🔁 Attempts per message: {dict(sorted(attempts.items()))}")
+    ideal = max(len(messages) / args.global_rate, (len(rendered) - 1) / args.chat_rate)
+    print(f"⏱️ Wall time {elapsed:.2f}s vs rate-limit floor {ideal:.2f}s")
+    print(f"🖥️ Server: {json.dumps(server_stats(base_url))}")
+    print(f"📡 Client timing: {json.dumps(client.timing_summary())}")
+    dispatcher.close()
+
+    if args.baseline:
+        baseline_client = TelegramClient('BENCHMARK', base_url=base_url, http2=False)
+        sample = fan_out(rendered, targets[:1])
+        started = time.perf_counter()
+        for message in sample:
+            baseline_client.post('sendMessage', message.payload())
+            time.sleep(args.baseline_sleep)
+        baseline = time.perf_counter() - started
+        print(f"🐢 Baseline (sequential + {args.baseline_sleep:.0f}s sleep) for one chat: {baseline:.2f}s "
+              f"for {len(sample)} messages")
+        baseline_client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Wall-clock and per-language latency: one combined translation task vs. one task per language.
+
+Simulates the LLM with a latency model (time to first token + output tokens / tokens per
+second) behind the same token-bucket pacing the bot uses, then runs
+  * the old single task: one call that writes all three translations, so every language is
+    ready only when the whole reply is done, and
+  * translations.translate_concurrently(): one call per language on a pool capped by
+    --concurrency (the bot uses the provider's burst size).
+
+Usage: python benchmarks/benchmark_translation.py --ttft 1.5 --tokens 450 --tps 60 --rate 0.5 --burst 2
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limiter import TokenBucket
+from translations import translate_concurrently, TRANSLATION_LANGUAGES
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ttft', type=float, default=1.5, help='seconds to first token per call')
+    parser.add_argument('--tokens', type=int, default=450, help='output tokens per translation')
+    parser.add_argument('--tps', type=float, default=60.0, help='output tokens per second')
+    parser.add_argument('--jitter', type=float, default=0.2, help='relative random variation per call')
+    parser.add_argument('--rate', type=float, default=0.5, help='provider pacing (calls/s)')
+    parser.add_argument('--burst', type=int, default=2, help='provider burst size')
+    parser.add_argument('--concurrency', type=int, default=0, help='translation workers (0 = --burst)')
+    parser.add_argument('--scale', type=float, default=0.1, help='time scale of the simulation (1 = real time)')
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    def llm_call(bucket, tokens):
+        bucket.acquire()
+        seconds = (args.ttft + tokens / args.tps) * (1 + rng.uniform(-args.jitter, args.jitter))
+        time.sleep(seconds * args.scale)
+
+    # Old: one task, one long reply with all languages
+    bucket = TokenBucket(args.rate / args.scale, args.burst, name='single')
+    started = time.perf_counter()
+    llm_call(bucket, args.tokens * len(TRANSLATION_LANGUAGES))
+    single = (time.perf_counter() - started) / args.scale
+    print(f"🐢 Single task: {single:.1f}s wall clock; every language ready after {single:.1f}s")
+
+    # New: one task per language, published as each finishes
+    bucket = TokenBucket(args.rate / args.scale, args.burst, name='per-language')
+    results = translate_concurrently(
+        lambda language: llm_call(bucket, args.tokens) or language,
+        max_workers=args.concurrency or args.burst
+    )
+    wall = max(result.available_after for result in results) / args.scale
+    for result in results:
+        print(f"   🌐 {result.language}: {result.latency / args.scale:.1f}s, "
+              f"ready after {result.available_after / args.scale:.1f}s")
+    first = min(result.available_after for result in results) / args.scale
+    print(f"⚡ Per-language tasks: {wall:.1f}s wall clock, first language after {first:.1f}s "
+          f"({single / wall:.2f}x faster overall, {single / first:.2f}x faster to first translation)")
+
+
+if __name__ == '__main__':
+    main()
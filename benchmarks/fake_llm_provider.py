@@ -0,0 +1,166 @@
+"""Deterministic stand-in for the LLM provider, registered with LiteLLM as a custom provider.
+
+Lets the whole crew run offline without spending quota:
+  * the research and analysis agents get canned market reports in CrewAI's
+    "Thought: ... Final Answer: ..." format
+  * each translation agent gets back every segment of its JSON context as
+    "[<language>] <source>", so numbers survive and translation memory accepts them
+  * latency is --ttft plus completion tokens / --tps; replies are padded to --tokens
+  * stream=True requests are answered chunk by chunk at the same pace
+Usage counts (prompt/completion tokens) are reported like a real provider's.
+
+Register it with register(...) and run the bot with LLM_PROVIDER=fakellm.
+"""
+import re
+import json
+import time
+import asyncio
+import threading
+
+import litellm
+from litellm import CustomLLM
+
+from sample_reports import SAMPLE_REPORT
+
+PROVIDER = 'fakellm'
+
+RESEARCH_REPORT = """US equities finished higher: the S&P 500 rose 0.85% to 5,648.40, the Nasdaq gained 1.13% to
+17,910.20 and the Dow added 212 points (+0.51%) to 41,780.00. Nvidia (+4.2%) led on data-center demand,
+Broadcom added 3.1% and Apple 1.4%; Tesla fell 3.1% on cautious delivery guidance and Walgreens slid 5.6%
+after cutting its outlook. The 10-year Treasury yield slipped 4 bps to 4.21% and the VIX eased to 14.8.
+Headlines: softer producer prices revived rate-cut hopes; oil fell 1.2% to $72.40; Thursday's CPI print
+is the next catalyst."""
+
+FILLER = [
+    "Volume ran 12% above the 30-day average.",
+    "Semiconductors outperformed the broader market by 2.6 points.",
+    "Utilities lagged with a 0.9% decline as yields stabilised.",
+    "Small caps in the Russell 2000 added 0.7%.",
+    "Advancers led decliners by roughly 2 to 1 on the NYSE.",
+]
+
+_TRANSLATION = re.compile(r'Translate segments of the financial analysis to (\w+)')
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _pad(text, tokens):
+    index = 0
+    while tokens and estimate_tokens(text) < tokens:
+        text += ' ' + FILLER[index % len(FILLER)]
+        index += 1
+    return text
+
+
+def _segments(prompt):
+    """The {"<id>": "<English>"} object a translation task works on, found anywhere in the prompt"""
+    decoder = json.JSONDecoder()
+    for match in re.finditer(r'\{', prompt):
+        try:
+            value, _ = decoder.raw_decode(prompt, match.start())
+        except ValueError:
+            continue
+        if isinstance(value, dict) and value and all(str(key).isdigit() for key in value):
+            return value
+    return None
+
+
+def _prompt_text(messages):
+    return '\n'.join(str(message.get('content') or '') for message in messages or [])
+
+
+class FakeLLM(CustomLLM):
+    def __init__(self, ttft=0.5, tps=80.0, tokens=0):
+        super().__init__()
+        self.ttft = ttft
+        self.tps = tps
+        self.tokens = tokens
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def reply(self, messages):
+        """The deterministic answer for a request"""
+        prompt = _prompt_text(messages)
+        translation = _TRANSLATION.search(prompt)
+        if translation:
+            language = translation.group(1)
+            segments = _segments(prompt) or {}
+            answer = json.dumps({'language': language,
+                                 'segments': {key: f'[{language}] {value}' for key, value in segments.items()}},
+                                ensure_ascii=False)
+        elif 'Financial News Researcher' in prompt:
+            answer = _pad(RESEARCH_REPORT, self.tokens)
+        else:
+            answer = _pad(SAMPLE_REPORT, self.tokens)
+        return f'Thought: I now can give a great answer\nFinal Answer: {answer}'
+
+    def _usage(self, messages, text):
+        prompt_tokens = estimate_tokens(_prompt_text(messages))
+        completion_tokens = estimate_tokens(text)
+        return {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens}
+
+    def _latency(self, text):
+        return self.ttft + estimate_tokens(text) / self.tps
+
+    def _count(self):
+        with self._lock:
+            self.calls += 1
+
+    def _response(self, model, messages, text):
+        usage = self._usage(messages, text)
+        return litellm.ModelResponse(
+            model=model,
+            choices=[{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': text}}],
+            usage=usage
+        )
+
+    def _pieces(self, text, size=16):
+        return [text[start:start + size] for start in range(0, len(text), size)]
+
+    def _chunk(self, piece, last=False, usage=None):
+        return {'text': piece, 'index': 0, 'is_finished': last, 'finish_reason': 'stop' if last else None,
+                'tool_use': None, 'usage': usage}
+
+    def completion(self, *args, model=None, messages=None, **kwargs):
+        self._count()
+        text = self.reply(messages)
+        time.sleep(self._latency(text))
+        return self._response(model, messages, text)
+
+    async def acompletion(self, *args, model=None, messages=None, **kwargs):
+        self._count()
+        text = self.reply(messages)
+        await asyncio.sleep(self._latency(text))
+        return self._response(model, messages, text)
+
+    def streaming(self, *args, model=None, messages=None, **kwargs):
+        self._count()
+        text = self.reply(messages)
+        pieces = self._pieces(text)
+        time.sleep(self.ttft)
+        for piece in pieces[:-1]:
+            time.sleep(estimate_tokens(piece) / self.tps)
+            yield self._chunk(piece)
+        yield self._chunk(pieces[-1] if pieces else '', last=True, usage=self._usage(messages, text))
+
+    async def astreaming(self, *args, model=None, messages=None, **kwargs):
+        self._count()
+        text = self.reply(messages)
+        pieces = self._pieces(text)
+        await asyncio.sleep(self.ttft)
+        for piece in pieces[:-1]:
+            await asyncio.sleep(estimate_tokens(piece) / self.tps)
+            yield self._chunk(piece)
+        yield self._chunk(pieces[-1] if pieces else '', last=True, usage=self._usage(messages, text))
+
+
+def register(ttft=0.5, tps=80.0, tokens=0):
+    """Register the fake provider with LiteLLM under PROVIDER and return it"""
+    handler = FakeLLM(ttft=ttft, tps=tps, tokens=tokens)
+    litellm.custom_provider_map = [
+        entry for entry in (litellm.custom_provider_map or []) if entry.get('provider') != PROVIDER
+    ] + [{'provider': PROVIDER, 'custom_handler': handler}]
+    return handler
@@ -0,0 +1,266 @@
+"""Local stand-in for the Telegram Bot API endpoints the bot uses.
+
+Mimics the behaviour that matters for delivery throughput and retries:
+  * sendMessage / editMessageText / deleteMessage / getMe under /bot<token>/<method>
+  * 429 "Too Many Requests" with parameters.retry_after when the per-chat or global
+    rate is exceeded (plus optional random 429 injection)
+  * 400 "can't parse entities" for malformed HTML, 400 "message is too long" over 4096
+  * configurable response latency and jitter
+GET /stats returns counters; GET /messages returns everything that was accepted.
+
+Point the bot at it with TELEGRAM_API_BASE=http://127.0.0.1:8081
+
+Usage: python benchmarks/fake_telegram_server.py --port 8081 --latency 0.05 --chat-limit 1
+"""
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from collections import defaultdict, deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+MAX_MESSAGE_LENGTH = 4096
+ALLOWED_TAGS = {
+    'b', 'strong', 'i', 'em', 'u', 'ins', 's', 'strike', 'del', 'span',
+    'tg-spoiler', 'a', 'code', 'pre', 'blockquote', 'tg-emoji'
+}
+_MARKUP = re.compile(r'<(/?)([^\s<>/]*)[^<>]*>|&(#\d+|#x[0-9a-fA-F]+|lt|gt|amp|quot);|[<>&]')
+_TAG = re.compile(r'<[^<>]*>')
+_ENTITY = re.compile(r'&(#\d+|#x[0-9a-fA-F]+|lt|gt|amp|quot);')
+
+
+def html_error(text):
+    """Return Telegram's error description for invalid HTML, or None if the text parses"""
+    stack = []
+    for match in _MARKUP.finditer(text):
+        token = match.group(0)
+        if token in ('<', '>', '&'):
+            if token == '>':
+                continue  # Telegram tolerates a bare '>'
+            return f"Bad Request: can't parse entities: unsupported start tag or unescaped '{token}' at byte offset {match.start()}"
+        if match.group(3) is not None:
+            continue
+        closing, name = match.group(1), match.group(2).lower()
+        if name not in ALLOWED_TAGS:
+            return f"Bad Request: can't parse entities: unsupported start tag \"{name}\" at byte offset {match.start()}"
+        if closing:
+            if not stack or stack[-1] != name:
+                return f"Bad Request: can't parse entities: can't find end tag corresponding to start tag \"{stack[-1] if stack else name}\""
+            stack.pop()
+        else:
+            stack.append(name)
+    if stack:
+        return f"Bad Request: can't parse entities: can't find end tag corresponding to start tag \"{stack[-1]}\""
+    return None
+
+
+def visible_length(text, parse_mode):
+    """Telegram counts the message length after entity parsing"""
+    if parse_mode != 'HTML':
+        return len(text)
+    return len(_ENTITY.sub('x', _TAG.sub('', text)))
+
+
+class FakeTelegramState:
+    def __init__(self, latency=0.0, jitter=0.0, chat_limit=3, global_limit=30,
+                 inject_429=0.0, retry_after=1, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.chat_limit = chat_limit
+        self.global_limit = global_limit
+        self.inject_429 = inject_429
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.chat_history = defaultdict(deque)   # chat_id -> recent accepted send times
+        self.global_history = deque()
+        self.messages = {}                       # (chat_id, message_id) -> message dict
+        self.next_message_id = 1
+        self.stats = defaultdict(int)
+
+    def throttle(self, chat_id):
+        """Sliding one-second windows per chat and globally; returns retry_after or None"""
+        now = time.monotonic()
+        with self.lock:
+            if self.inject_429 and self.random.random() < self.inject_429:
+                self.stats['injected_429'] += 1
+                return self.retry_after
+            chat = self.chat_history[chat_id]
+            for window in (chat, self.global_history):
+                while window and now - window[0] >= 1.0:
+                    window.popleft()
+            if len(chat) >= self.chat_limit or len(self.global_history) >= self.global_limit:
+                self.stats['throttled'] += 1
+                return self.retry_after
+            chat.append(now)
+            self.global_history.append(now)
+        return None
+
+    def store(self, chat_id, payload):
+        with self.lock:
+            message_id = self.next_message_id
+            self.next_message_id += 1
+            message = {
+                'message_id': message_id,
+                'chat': {'id': chat_id},
+                'date': int(time.time()),
+                'text': payload.get('text', ''),
+            }
+            if payload.get('message_thread_id'):
+                message['message_thread_id'] = payload['message_thread_id']
+            self.messages[(str(chat_id), message_id)] = message
+            return message
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            with state.lock:
+                state.stats[f'http_{status}'] += 1
+
+        def _error(self, status, description, parameters=None):
+            body = {'ok': False, 'error_code': status, 'description': description}
+            if parameters:
+                body['parameters'] = parameters
+            self._reply(status, body)
+
+        def do_GET(self):
+            if self.path == '/stats':
+                with state.lock:
+                    stats = dict(state.stats)
+                self._reply(200, stats)
+            elif self.path == '/messages':
+                with state.lock:
+                    messages = list(state.messages.values())
+                self._reply(200, messages)
+            elif self.path.endswith('/getMe'):
+                self._reply(200, {'ok': True, 'result': {'id': 1, 'is_bot': True, 'username': 'fake_bot'}})
+            else:
+                self._error(404, 'Not Found')
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            if state.latency or state.jitter:
+                time.sleep(state.latency + state.random.uniform(0, state.jitter))
+            match = re.fullmatch(r'/bot([^/]+)/(\w+)', self.path)
+            if not match:
+                return self._error(404, 'Not Found')
+            method = match.group(2)
+            with state.lock:
+                state.stats[f'calls_{method}'] += 1
+            try:
+                payload = json.loads(raw or b'{}')
+            except ValueError:
+                return self._error(400, 'Bad Request: invalid JSON')
+            handler = getattr(self, f'_method_{method}', None)
+            if handler is None:
+                return self._error(404, 'Not Found: method not found')
+            handler(payload)
+
+        def _validate_text(self, payload):
+            text = payload.get('text')
+            if not text or not str(text).strip():
+                return 'Bad Request: message text is empty'
+            parse_mode = payload.get('parse_mode')
+            if parse_mode == 'HTML':
+                error = html_error(text)
+                if error:
+                    return error
+            if visible_length(text, parse_mode) > MAX_MESSAGE_LENGTH:
+                return 'Bad Request: message is too long'
+            return None
+
+        def _method_getMe(self, payload):
+            self._reply(200, {'ok': True, 'result': {'id': 1, 'is_bot': True, 'username': 'fake_bot'}})
+
+        def _method_sendMessage(self, payload):
+            chat_id = payload.get('chat_id')
+            if chat_id in (None, ''):
+                return self._error(400, 'Bad Request: chat not found')
+            error = self._validate_text(payload)
+            if error:
+                return self._error(400, error)
+            retry_after = state.throttle(str(chat_id))
+            if retry_after is not None:
+                return self._error(429, f'Too Many Requests: retry after {retry_after}', {'retry_after': retry_after})
+            self._reply(200, {'ok': True, 'result': state.store(chat_id, payload)})
+
+        def _method_editMessageText(self, payload):
+            key = (str(payload.get('chat_id')), payload.get('message_id'))
+            with state.lock:
+                message = state.messages.get(key)
+            if message is None:
+                return self._error(400, 'Bad Request: message to edit not found')
+            error = self._validate_text(payload)
+            if error:
+                return self._error(400, error)
+            if payload.get('text') == message['text']:
+                return self._error(400, 'Bad Request: message is not modified')
+            retry_after = state.throttle(key[0])
+            if retry_after is not None:
+                return self._error(429, f'Too Many Requests: retry after {retry_after}', {'retry_after': retry_after})
+            with state.lock:
+                message['text'] = payload['text']
+                message['edit_date'] = int(time.time())
+            self._reply(200, {'ok': True, 'result': message})
+
+        def _method_deleteMessage(self, payload):
+            key = (str(payload.get('chat_id')), payload.get('message_id'))
+            with state.lock:
+                removed = state.messages.pop(key, None)
+            if removed is None:
+                return self._error(400, 'Bad Request: message to delete not found')
+            self._reply(200, {'ok': True, 'result': True})
+
+    return Handler
+
+
+def start_server(host='127.0.0.1', port=0, **options):
+    """Start the stand-in server on a daemon thread; returns (server, state, base_url)"""
+    state = FakeTelegramState(**options)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='fake-telegram', daemon=True).start()
+    return server, state, f'http://{host}:{server.server_address[1]}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every POST')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random latency (seconds)')
+    parser.add_argument('--chat-limit', type=int, default=3, help='messages accepted per chat in any 1s window')
+    parser.add_argument('--global-limit', type=int, default=30, help='messages accepted overall in any 1s window')
+    parser.add_argument('--inject-429', type=float, default=0.0, help='probability of a spurious 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='retry_after returned with 429s')
+    args = parser.parse_args()
+
+    server, _, base_url = start_server(
+        args.host, args.port, latency=args.latency, jitter=args.jitter, chat_limit=args.chat_limit,
+        global_limit=args.global_limit, inject_429=args.inject_429,
+        retry_after=args.retry_after
+    )
+    print(f"🧪 Fake Telegram Bot API listening on {base_url} (set TELEGRAM_API_BASE={base_url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
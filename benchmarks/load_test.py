@@ -0,0 +1,151 @@
+"""Load test: N concurrent report pipelines on one host, ramped up until something saturates.
+
+Every pipeline is a benchmark_e2e.py worker process (financial_bot.main() against the fake
+LLM provider) broadcasting to its own chats. All pipelines share one stand-in Telegram
+server and, by default, one provider quota through the SQLite rate-limit backend, like
+several markets served by one bot on one host. For each concurrency level this reports:
+  * throughput (pipelines/minute) and p50/p95/p99 end-to-end latency of main()
+  * peak RSS per pipeline process and host CPU utilisation
+  * the share of pipeline time spent waiting for the LLM rate limiter, and Telegram 429s
+The run stops being scalable where throughput stops growing; the report names the level
+and whether the rate limiter or the CPU was the bottleneck there.
+
+Usage: python benchmarks/load_test.py --levels 1,2,4,8 --ttft 0.3 --tps 200 --rate-limit-delay 0.2
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_e2e import REPO, add_config_arguments, worker_command, worker_environment, parse_worker_output
+from fake_telegram_server import start_server
+
+DEFAULT_RESULTS = os.path.join(REPO, 'state', 'benchmarks', 'load_test.jsonl')
+# Throughput growing by less than this from one level to the next counts as saturated
+SATURATION_GAIN = 1.10
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def run_level(args, pipelines, base_url):
+    """Start `pipelines` workers at once and wait for all of them; returns the level's measurements"""
+    rate_limit_db = None
+    if args.shared_quota:
+        rate_limit_db = os.path.join(tempfile.mkdtemp(prefix='financial-bot-load-'), 'rate_limits.db')
+    started = time.perf_counter()
+    processes = []
+    for index in range(pipelines):
+        worker = argparse.Namespace(**{**vars(args), 'telegram_url': base_url, 'rate_limit_db': rate_limit_db,
+                                       'chat_offset': index * args.chats})
+        extra = ['--telegram-url', base_url, '--chat-offset', str(worker.chat_offset)]
+        if rate_limit_db:
+            extra += ['--rate-limit-db', rate_limit_db]
+        # The configuration goes in the environment so every repo module sees it at import time
+        processes.append(subprocess.Popen(worker_command(worker, *extra), stdout=subprocess.PIPE,
+                                          stderr=subprocess.PIPE, text=True,
+                                          env={**os.environ, **worker_environment(worker)}))
+    results, failures = [], 0
+    for process in processes:
+        stdout, stderr = process.communicate(timeout=args.timeout)
+        result = parse_worker_output(stdout)
+        if result is None or not result['success']:
+            failures += 1
+            if result is None:
+                print(f"   ⚠️ pipeline exited with {process.returncode}: {stderr.strip()[-300:]}")
+        if result is not None:
+            results.append(result)
+    elapsed = time.perf_counter() - started
+    if not results:
+        raise SystemExit(f'No pipeline finished at concurrency {pipelines}')
+
+    latencies = [result['wall_seconds'] for result in results]
+    busy = sum(result['wall_seconds'] for result in results) or 1e-9
+    return {
+        'pipelines': pipelines,
+        'failures': failures,
+        'elapsed_seconds': round(elapsed, 3),
+        'throughput_per_minute': round(60 * len(results) / elapsed, 2),
+        'p50_seconds': percentile(latencies, 0.50),
+        'p95_seconds': percentile(latencies, 0.95),
+        'p99_seconds': percentile(latencies, 0.99),
+        'peak_rss_mb_per_pipeline': round(sum(result['peak_rss_mb'] for result in results) / len(results), 1),
+        'cpu_utilisation': round(sum(result['cpu_seconds'] for result in results) / (elapsed * os.cpu_count()), 3),
+        'rate_limit_share': round(sum(result['totals']['rate_limit'] for result in results) / busy, 3),
+        'overhead_share': round(sum(result['overhead_seconds'] for result in results) / busy, 3),
+    }
+
+
+def bottleneck(level, args):
+    """What limits a saturated level: the CPU, the shared LLM rate limiter or neither"""
+    if level['cpu_utilisation'] >= args.cpu_threshold:
+        return 'CPU'
+    if level['rate_limit_share'] >= args.rate_limit_threshold:
+        return 'LLM rate limiter'
+    return 'neither CPU nor rate limiter (I/O or Telegram pacing)'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_config_arguments(parser)
+    parser.add_argument('--levels', default='1,2,4,8', help='comma-separated concurrency levels')
+    parser.add_argument('--separate-quotas', dest='shared_quota', action='store_false',
+                        help='give every pipeline its own in-memory rate limiter instead of one shared quota')
+    parser.add_argument('--cpu-threshold', type=float, default=0.8, help='CPU utilisation treated as CPU-bound')
+    parser.add_argument('--rate-limit-threshold', type=float, default=0.3,
+                        help='share of pipeline time spent in rate-limit waits treated as limiter-bound')
+    parser.add_argument('--results', default=DEFAULT_RESULTS, help='JSONL file the results are appended to')
+    parser.add_argument('--timeout', type=float, default=900, help='seconds per pipeline')
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(',') if level.strip()]
+
+    server, telegram_state, base_url = start_server(latency=args.telegram_latency)
+    print(f"🧪 Load test on {os.cpu_count()} CPUs: levels {levels}, "
+          f"{'one shared' if args.shared_quota else 'separate'} provider quota, "
+          f"RATE_LIMIT_DELAY {args.rate_limit_delay}s, stand-in Telegram at {base_url}")
+    report, saturated = [], None
+    for pipelines in levels:
+        throttled_before = telegram_state.stats.get('throttled', 0)
+        level = run_level(args, pipelines, base_url)
+        level['telegram_429s'] = telegram_state.stats.get('throttled', 0) - throttled_before
+        report.append(level)
+        print(f"   N={pipelines}: {level['throughput_per_minute']:.1f} pipelines/min, latency p50 "
+              f"{level['p50_seconds']:.1f}s / p95 {level['p95_seconds']:.1f}s / p99 {level['p99_seconds']:.1f}s, "
+              f"{level['peak_rss_mb_per_pipeline']:.0f} MB per pipeline, CPU {level['cpu_utilisation']:.0%}, "
+              f"rate-limit wait {level['rate_limit_share']:.0%}, Telegram 429s {level['telegram_429s']}"
+              + (f", {level['failures']} failed" if level['failures'] else ''))
+        if saturated is None and len(report) > 1 and \
+                level['throughput_per_minute'] < report[-2]['throughput_per_minute'] * SATURATION_GAIN:
+            saturated = level
+    server.shutdown()
+
+    if saturated is None:
+        print(f"📈 No saturation up to N={levels[-1]}: throughput still growing")
+    else:
+        best = max(report, key=lambda level: level['throughput_per_minute'])
+        print(f"🧱 Saturates at N={saturated['pipelines']} ({best['throughput_per_minute']:.1f} pipelines/min peak "
+              f"at N={best['pipelines']}); bottleneck: {bottleneck(saturated, args)}")
+
+    directory = os.path.dirname(args.results)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    config = {key: getattr(args, key) for key in ('ttft', 'tps', 'tokens', 'chats', 'telegram_latency',
+                                                  'rate_limit_delay', 'stream', 'shared_quota')}
+    with open(args.results, 'a', encoding='utf-8') as handle:
+        handle.write(json.dumps({'timestamp': time.time(), 'config': config, 'levels': report,
+                                 'saturated_at': saturated['pipelines'] if saturated else None,
+                                 'bottleneck': bottleneck(saturated, args) if saturated else None}) + '\n')
+    print(f"🗂️ Results appended to {args.results}")
+
+
+if __name__ == '__main__':
+    main()
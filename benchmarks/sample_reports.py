@@ -0,0 +1,18 @@
+"""Sample analyst report (Markdown with citations, the shape sonar-pro returns) shared by the
+benchmarks. Kept free of repo imports so importing it never freezes module-level config."""
+
+SAMPLE_REPORT = """## 📈 MARKET OVERVIEW (120 words)
+The **S&P 500** closed +0.85% at 5,648.40 while the Nasdaq gained 1.13% and the Dow added 212 points[1][2].
+Breadth was positive with advancers leading decliners 2:1 on volume of 11.2 billion shares. The 10-year
+Treasury yield slipped 4 bps to 4.21%, and the VIX eased to 14.8 [3].
+
+## 📊 KEY MOVERS & CATALYSTS (120 words)
+- **Nvidia (NVDA)** rose +4.2% to $135.50 on data-center demand ahead of earnings [4].
+- **Tesla (TSLA)** fell -3.1% after cautious delivery guidance; shares trade at $212.30.
+- *Apple* added 1.4%, lifting its market cap above $3.4T.
+Sector rotation favoured semiconductors (+2.6%) over utilities (-0.9%).
+
+## 💡 MARKET IMPLICATIONS (60 words)
+Momentum favours large-cap tech; watch Thursday's CPI print for rate-path repricing. A hotter
+reading than 3.1% could push yields back toward 4.35% and pressure multiples [5].
+"""
@@ -0,0 +1,69 @@
+import logging
+
+from telegram_dispatcher import OutgoingMessage
+
+logger = logging.getLogger(__name__)
+
+
+class ChatTarget:
+    """A chat to deliver to, optionally a forum topic inside it (message_thread_id)"""
+
+    def __init__(self, chat_id, thread_id=None):
+        self.chat_id = str(chat_id)
+        self.thread_id = int(thread_id) if thread_id not in (None, '') else None
+
+    def __repr__(self):
+        return f'{self.chat_id}:{self.thread_id}' if self.thread_id else self.chat_id
+
+
+def parse_chat_targets(value, path=None):
+    """Parse 'chat[:topic], chat[:topic], ...' (env var) plus one target per line from an optional file.
+
+    Duplicates are dropped while keeping the first-seen order.
+    """
+    entries = []
+    if value:
+        entries.extend(value.replace('\n', ',').split(','))
+    if path:
+        with open(path, encoding='utf-8') as handle:
+            entries.extend(line.split('#', 1)[0] for line in handle)
+    targets, seen = [], set()
+    for entry in entries:
+        entry = entry.strip()
+        if not entry:
+            continue
+        # Chat ids may be negative (-100...) or @channelusername; the topic follows the last ':'
+        chat_id, _, thread_id = entry.rpartition(':') if entry.count(':') == 1 else (entry, '', '')
+        target = ChatTarget(chat_id, thread_id or None)
+        if repr(target) not in seen:
+            seen.add(repr(target))
+            targets.append(target)
+    return targets
+
+
+def fan_out(rendered, targets):
+    """Address messages rendered once (chat-agnostic) to every target.
+
+    The result is ordered chunk-major (every chat gets part 1 before anyone gets part 2),
+    which spreads the global rate budget fairly across chats.
+    """
+    messages = []
+    for template in rendered:
+        for target in targets:
+            messages.append(OutgoingMessage(
+                target.chat_id, template.text, language=template.language, parse_mode=template.parse_mode,
+                disable_web_page_preview=template.disable_web_page_preview, chunk_index=template.chunk_index,
+                chunk_count=template.chunk_count, run_id=template.run_id, thread_id=target.thread_id
+            ))
+    return messages
+
+
+def broadcast_summary(report, targets):
+    """One-line throughput summary for a broadcast DeliveryReport"""
+    elapsed = max(report.elapsed, 1e-6)
+    failed_chats = sorted({repr(ChatTarget(r.message.chat_id, r.message.thread_id)) for r in report.failed})
+    summary = (f'📡 Broadcast: {len(report.sent)}/{len(report.results)} messages to {len(targets)} chats '
+               f'in {report.elapsed:.1f}s ({len(report.sent) / elapsed:.1f} msg/s)')
+    if failed_chats:
+        summary += f"; failed chats: {', '.join(failed_chats[:10])}" + (' ...' if len(failed_chats) > 10 else '')
+    return summary
@@ -0,0 +1,71 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DIR = os.getenv('CHECKPOINT_DIR', os.path.join('state', 'checkpoints'))
+# Checkpoints of runs older than this are deleted (a day-old analysis is not worth resuming)
+CHECKPOINT_MAX_AGE = float(os.getenv('CHECKPOINT_MAX_AGE', str(24 * 3600)))
+
+
+class RunCheckpoint:
+    """Outputs of the completed stages of one run, written to a JSON file after every stage.
+
+    A stage is saved from a CrewAI task callback (callback()) or explicitly (save()); a retry
+    or a later process started with the same RUN_ID reads them back and skips those stages.
+    """
+
+    def __init__(self, run_id, directory=CHECKPOINT_DIR):
+        self.run_id = run_id
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, re.sub(r'[^\w.-]', '_', str(run_id)) + '.json')
+        self._lock = threading.Lock()
+        self.stages = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding='utf-8') as handle:
+                    self.stages = json.load(handle).get('stages', {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+
+    def completed(self, stage):
+        return stage in self.stages
+
+    def get(self, stage):
+        """Raw output of a completed stage, or None"""
+        record = self.stages.get(stage)
+        return record['raw'] if record else None
+
+    def save(self, stage, raw):
+        """Record a stage's output; the file is replaced atomically so a crash never leaves half a checkpoint"""
+        with self._lock:
+            self.stages[stage] = {'raw': raw, 'completed_at': time.time()}
+            temporary = f'{self.path}.tmp'
+            with open(temporary, 'w', encoding='utf-8') as handle:
+                json.dump({'run_id': self.run_id, 'stages': self.stages}, handle, ensure_ascii=False)
+            os.replace(temporary, self.path)
+
+    def callback(self, stage):
+        """CrewAI Task callback that checkpoints the task's output as `stage`"""
+        def checkpoint_task(output):
+            self.save(stage, output.raw)
+            logger.info(f"Checkpointed stage '{stage}' of run {self.run_id}")
+        return checkpoint_task
+
+
+def prune_checkpoints(directory=CHECKPOINT_DIR, max_age=CHECKPOINT_MAX_AGE):
+    """Delete checkpoint files not modified for max_age seconds; returns how many"""
+    if not os.path.isdir(directory):
+        return 0
+    removed = 0
+    cutoff = time.time() - max_age
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.endswith('.json') and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+            removed += 1
+    return removed
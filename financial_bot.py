@@ -2,12 +2,32 @@ import os
 import time
 import json
 import logging
-import requests
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 from crewai import Agent, Task, Crew, Process, LLM
-from crewai.tools import tool
+from crewai.tasks.task_output import TaskOutput
+
+import llm_hooks
+from rate_limiter import rate_limiters, on_llm_response, on_llm_error
+from llm_cache import llm_cache, lookup_cached_response, cache_llm_response
+from telegram_client import TelegramClient
+from telegram_dispatcher import TelegramDispatcher, OutgoingMessage
+from telegram_html import chunk_html, TELEGRAM_MAX_LENGTH
+from outbound_queue import OutboundQueue
+from broadcast import parse_chat_targets, fan_out, broadcast_summary
+from translations import (SegmentTranslations, segment_translations_from_output, translate_concurrently,
+                          TRANSLATION_LANGUAGES, TRANSLATION_CONCURRENCY)
+from report_formatter import format_report
+from translation_memory import TranslationMemory
+from checkpoints import RunCheckpoint, prune_checkpoints
+from streaming_preview import StreamingPreview, STREAM_SUMMARY
+from usage_tracker import usage_tracker, record_llm_usage
+from run_timeline import timeline, record_llm_call, record_llm_error
+from tracing import export_trace
+from metrics import (observe_span, observe_first_message, start_metrics_server, MESSAGE_SPLITS, DELIVERY_FAILURES,
+                     TRANSLATION_FAILURES, RUNS, LAST_SUCCESS)
 
 # Load environment variables
 load_dotenv()
@@ -21,105 +41,217 @@ PERPLEXITY_API_KEY = os.getenv('PERPLEXITY_API_KEY')
 MODEL_NAME = os.getenv('MODEL_NAME', 'sonar-pro')  # ✅ CORRECTED: Valid model name
 LLM_PROVIDER = os.getenv('LLM_PROVIDER', 'perplexity')
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
-TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')  # one id, or a comma-separated list of chat[:topic] targets
+TELEGRAM_CHAT_IDS_FILE = os.getenv('TELEGRAM_CHAT_IDS_FILE')  # optional file with one chat[:topic] per line
 
-# Rate limiting
-last_api_call = 0
-RATE_LIMIT_DELAY = 15
+# Every chat/topic a report is broadcast to; the crew runs once regardless of how many there are
+TELEGRAM_TARGETS = parse_chat_targets(TELEGRAM_CHAT_ID, TELEGRAM_CHAT_IDS_FILE)
 
-def wait_for_rate_limit():
-    """Rate limiting for API calls"""
-    global last_api_call
-    current_time = time.time()
-    time_since_last = current_time - last_api_call
-    
-    if time_since_last < RATE_LIMIT_DELAY:
-        wait_time = RATE_LIMIT_DELAY - time_since_last
-        print(f"⏳ Rate limiting: waiting {wait_time:.1f}s...")
+# Bot API base URL; point at benchmarks/fake_telegram_server.py for offline runs
+TELEGRAM_API_BASE = os.getenv('TELEGRAM_API_BASE', 'https://api.telegram.org')
+
+# Pooled keep-alive client shared by every Telegram call
+telegram = TelegramClient(TELEGRAM_BOT_TOKEN, base_url=TELEGRAM_API_BASE,
+                          http2=os.getenv('TELEGRAM_HTTP2', 'true').lower() == 'true')
+# Async sender paced by Telegram's global and per-chat limits
+dispatcher = TelegramDispatcher(telegram, timeline=timeline)
+# Finished spans (LLM calls, rate-limit waits, Telegram requests) feed the Prometheus metrics
+timeline.add_listener(observe_span)
+# Durable record of what each run has delivered, so workflow retries never post duplicates
+outbound_queue = OutboundQueue()
+current_run_id = os.getenv('RUN_ID') or datetime.now().strftime('%Y%m%d-%H%M%S')
+# Segment translations from earlier reports, so only new sentences go to the LLM
+translation_memory = TranslationMemory()
+
+# Rate limiting - applied to real LiteLLM requests via llm_hooks, not to task construction
+def wait_for_rate_limit(provider=LLM_PROVIDER, stage=None):
+    """Block until the provider's token bucket allows another API call"""
+    wait_time = rate_limiters.bucket(provider).reserve()
+    if wait_time > 0:
+        print(f"⏳ Rate limiting ({provider}): waiting {wait_time:.1f}s...")
+        started = time.time()
         time.sleep(wait_time)
-    
-    last_api_call = time.time()
+        timeline.record(f'rate limit {provider}', 'rate_limit', started, time.time(), stage=stage, provider=provider)
+    return wait_time
 
-@tool('send_telegram_message')
-def send_telegram_message(message: str, language: str = 'English') -> str:
-    """Send message to Telegram channel with proper validation and formatting"""
-    try:
-        # Handle different input types
-        if not isinstance(message, str):
-            if isinstance(message, list):
-                # Extract content for specific language from JSON array
-                for item in message:
-                    if isinstance(item, dict) and item.get('language') == language:
-                        message = item.get('message', '')
-                        break
-                else:
-                    # If no matching language found, use first available message
-                    message = message[0].get('message', '') if message else ''
+async def wait_for_rate_limit_async(provider=LLM_PROVIDER, stage=None):
+    """Asyncio variant of wait_for_rate_limit() for litellm.acompletion()"""
+    started = time.time()
+    wait_time = await rate_limiters.bucket(provider).acquire_async()
+    if wait_time > 0:
+        print(f"⏳ Rate limiting ({provider}): waited {wait_time:.1f}s")
+        timeline.record(f'rate limit {provider}', 'rate_limit', started, time.time(), stage=stage, provider=provider)
+    return wait_time
+
+# Identical requests within the cache's freshness window (e.g. a workflow retry) are answered locally
+llm_hooks.add_lookup_hook(lookup_cached_response)
+llm_hooks.add_pre_call_hook(
+    lambda call: wait_for_rate_limit(call.provider, call.metadata.get('stage')),
+    lambda call: wait_for_rate_limit_async(call.provider, call.metadata.get('stage'))
+)
+llm_hooks.add_post_call_hook(on_llm_response)
+llm_hooks.add_post_call_hook(cache_llm_response)
+llm_hooks.add_error_hook(on_llm_error)
+llm_hooks.add_completion_hook(record_llm_usage)
+llm_hooks.add_completion_hook(record_llm_call)
+llm_hooks.add_error_hook(record_llm_error)
+llm_hooks.install()
+
+def build_telegram_messages(message, language='English'):
+    """Validate report content and render it once into Telegram-sized OutgoingMessage chunks
+    (not yet addressed to a chat); returns an empty list for empty content"""
+    # Handle different input types
+    if not isinstance(message, str):
+        if isinstance(message, list):
+            # Extract content for specific language from JSON array
+            for item in message:
+                if isinstance(item, dict) and item.get('language') == language:
+                    message = item.get('message', '')
+                    break
             else:
-                message = str(message)
-        
-        # Validation - Check for empty content
-        if not message or message.strip() == '':
-            print(f'⚠️ WARNING: Empty message content for {language}, skipping send.')
-            return f'❌ {language} send skipped: empty message'
-        
-        print(f'📤 Sending {language} message ({len(message)} characters)')
-        
-        url = f'https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage'
-        
-        # Limit message size to avoid Telegram limits
-        if len(message) > 4000:
-            message = message[:3900] + '... [Truncated for Telegram limits]'
-            print(f'✂️ Message truncated to {len(message)} characters')
-        
-        # HTML entity cleanup - Fix encoding issues
-        message = message.replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>')
-        
-        # Format final message for Telegram
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M IST')
-        formatted_msg = f"""<b>🔹 {language} Financial Analysis</b>
+                # If no matching language found, use first available message
+                message = message[0].get('message', '') if message else ''
+        else:
+            message = str(message)
+    
+    # Validation - Check for empty content
+    if not message or message.strip() == '':
+        print(f'⚠️ WARNING: Empty message content for {language}, skipping send.')
+        return []
+    
+    print(f'📤 Sending {language} message ({len(message)} characters)')
+    
+    # Format final message for Telegram
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M IST')
+    header = f"""<b>🔹 {language} Financial Analysis</b>
 📅 {timestamp}
 🤖 <i>CrewAI + Perplexity Pro Financial Intelligence</i>
 🏢 <i>CrowdWisdomTrading Internship Assessment</i>
 
-{message}
+"""
+    footer = """
 
 💡 <i>Powered by Real-time AI Multi-Agent System</i>"""
-        
-        # Proper Telegram payload - Single string, not JSON array
-        payload = {
-            'chat_id': TELEGRAM_CHAT_ID,
-            'text': formatted_msg,
-            'parse_mode': 'HTML',
-            'disable_web_page_preview': False
-        }
-        
-        response = requests.post(url, json=payload, timeout=30)
-        
-        if response.status_code == 200:
-            print(f'✅ {language} sent successfully!')
-            time.sleep(3)  # Rate limiting between messages
-            return f'✅ {language} sent successfully'
+    
+    # Split at paragraph/sentence boundaries instead of truncating; tags stay balanced per chunk
+    budget = TELEGRAM_MAX_LENGTH - max(len(header), len(footer)) - 40
+    chunks = chunk_html(message, budget)
+    if len(chunks) > 1:
+        print(f'✂️ {language} message split into {len(chunks)} parts')
+        MESSAGE_SPLITS.inc(language=language)
+    
+    messages = []
+    for index, chunk in enumerate(chunks):
+        prefix = header if index == 0 else f'<b>🔹 {language} ({index + 1}/{len(chunks)})</b>\n\n'
+        suffix = footer if index == len(chunks) - 1 else ''
+        messages.append(OutgoingMessage(None, prefix + chunk + suffix, language=language,
+                                        chunk_index=index, chunk_count=len(chunks)))
+    return messages
+
+def deliver_telegram_messages(messages, run_id=None, targets=None, replace=None):
+    """Fan rendered messages out to every target chat, queue them under the run's idempotency
+    keys, dispatch whatever is still undelivered within Telegram limits and return a DeliveryReport.
+
+    replace maps (chat_id, thread_id) to a message already in that chat (a streamed preview);
+    the first chunk is edited into it instead of being posted as a new message."""
+    run_id = run_id or current_run_id
+    targets = targets or TELEGRAM_TARGETS
+    for message in messages:
+        message.run_id = run_id
+    addressed = fan_out(messages, targets)
+    pending = outbound_queue.enqueue(run_id, addressed)
+    if len(pending) < len(addressed):
+        print(f"♻️ {len(addressed) - len(pending)} messages already delivered in run {run_id}, not resending")
+    if replace:
+        for message in pending:
+            if message.chunk_index == 0:
+                message.message_id = replace.get((message.chat_id, message.thread_id))
+    report = dispatcher.dispatch_sync(pending)
+    outbound_queue.record_many(report.results)
+    for result in report.failed:
+        DELIVERY_FAILURES.inc(language=result.message.language)
+    if len(targets) == 1:
+        for result in report.results:
+            print(str(result))
+    else:
+        print(broadcast_summary(report, targets))
+    return report
+
+def drain_outbound_queue():
+    """Deliver messages left pending by an earlier run that crashed mid-delivery. Messages leased
+    by another live process (one still delivering them) are not touched"""
+    expired = outbound_queue.expire()
+    if expired:
+        print(f"🗑️ Dropped {expired} stale undelivered messages from the outbound queue")
+    backlog = outbound_queue.claim(exclude_run_id=current_run_id)
+    if not backlog:
+        return None
+    print(f"📮 Draining {len(backlog)} undelivered messages from earlier runs...")
+    report = dispatcher.dispatch_sync(backlog)
+    outbound_queue.record_many(report.results)
+    for result in report.failed:
+        DELIVERY_FAILURES.inc(language=result.message.language)
+    print(f"📮 Backlog delivered: {len(report.sent)}/{len(report.results)} in {report.elapsed:.1f}s")
+    return report
+
+def publish_language(language, body, run_id=None, replace=None):
+    """Publishing stage without an LLM: format one language version as Telegram HTML and deliver
+    it to every target. Called for each language as soon as it is ready; None if it is empty"""
+    with timeline.span(f'publish:{language}', 'publish', stage=f'publish:{language}'):
+        outgoing = build_telegram_messages(format_report(body), language)
+        if not outgoing:
+            return None
+        report = deliver_telegram_messages(outgoing, run_id=run_id, replace=replace)
+    print(f"📱 Published {language}: {len(report.sent)}/{len(report.results)} messages sent in {report.elapsed:.1f}s")
+    return report
+
+def translate_analysis(analysis, language, task, agent):
+    """Translate the analysis into one language, reusing remembered segments and sending only
+    the new ones to the translation task; returns the assembled translation"""
+    plan = translation_memory.plan(analysis, language)
+    translated = {}
+    missing = plan.missing
+    if missing:
+        output = task.execute_sync(agent=agent, context=plan.prompt())
+        translated = segment_translations_from_output(output, missing)
+        if not translated:
+            raise ValueError(f'{language} translation reply contained no usable segments')
+        if len(translated) < len(missing):
+            print(f"⚠️ {language}: {len(missing) - len(translated)} segments came back untranslated")
+        translation_memory.learn(plan, translated)
+    print(f"🧠 {plan.summary()}")
+    return plan.assemble(translated)
+
+def resume_tasks(stages, checkpoint):
+    """Restore the outputs of checkpointed (stage, task) pairs and return the tasks still to run.
+
+    The first remaining task gets the last restored task as its context, so the crew resumes
+    exactly where the previous attempt stopped."""
+    restored, remaining = [], []
+    for stage, task in stages:
+        if checkpoint.completed(stage) and not remaining:
+            task.output = TaskOutput(description=task.description, raw=checkpoint.get(stage), agent=task.agent.role)
+            restored.append(task)
         else:
-            error_data = response.json() if response.content else {'description': 'Unknown error'}
-            print(f'❌ {language} failed: {error_data.get("description", "Unknown error")}')
-            return f'❌ {language} failed: {error_data.get("description", "Unknown error")}'
-        
-    except Exception as e:
-        error_msg = f'❌ {language} error: {str(e)[:100]}'
-        print(error_msg)
-        return error_msg
+            remaining.append(task)
+    if restored and remaining:
+        remaining[0].context = [restored[-1]]
+    return remaining
 
 def create_perplexity_agents():
     """Create CrewAI agents using Perplexity Pro models"""
     
     # ✅ CORRECTED: Using valid Perplexity model name
-    perplexity_llm = LLM(
-        model=f'perplexity/{MODEL_NAME}',  # Uses your MODEL_NAME from .env (sonar-pro)
-        api_key=PERPLEXITY_API_KEY,       # Uses your PERPLEXITY_API_KEY from .env
-        max_tokens=1500,
-        temperature=0.3
-    )
+    def perplexity_llm(stage, **options):
+        # One LLM per agent: the stage tag in the LiteLLM metadata attributes its tokens and cost
+        return LLM(
+            model=f'{LLM_PROVIDER}/{MODEL_NAME}',  # Uses your LLM_PROVIDER and MODEL_NAME from .env (perplexity/sonar-pro)
+            api_key=PERPLEXITY_API_KEY,       # Uses your PERPLEXITY_API_KEY from .env
+            max_tokens=1500,
+            temperature=0.3,
+            metadata={'stage': stage},
+            **options
+        )
     
     # Financial Research Agent with real-time data access
     search_agent = Agent(
@@ -130,7 +262,7 @@ def create_perplexity_agents():
         significant market movements that impact trading and investment decisions.""",
         verbose=True,
         allow_delegation=False,
-        llm=perplexity_llm,
+        llm=perplexity_llm('search'),
         max_iter=1,
         memory=False
     )
@@ -144,56 +276,102 @@ def create_perplexity_agents():
         clients and professional traders.""",
         verbose=True,
         allow_delegation=False,
-        llm=perplexity_llm,
+        llm=perplexity_llm('summary', stream=STREAM_SUMMARY),  # streamed so subscribers can watch it being written
         max_iter=1,
         memory=False
     )
     
-    # Content Formatting Agent
-    formatting_agent = Agent(
-        role='Financial Content Formatter', 
-        goal='Format financial content with professional HTML structure',
-        backstory="""You are a content specialist who formats financial analysis for professional 
-        distribution. You ensure consistent formatting, proper emphasis, and clear information hierarchy.""",
-        verbose=True,
-        allow_delegation=False,
-        llm=perplexity_llm,
-        max_iter=1,
-        memory=False
-    )
-    
-    # Multilingual Translation Agent
-    translation_agent = Agent(
-        role='Financial Translator',
-        goal='Translate financial content to Arabic, Hindi, and Hebrew',
-        backstory="""You are a professional financial translator with expertise in multilingual 
-        financial communications. You maintain technical accuracy while adapting content for 
-        different linguistic and cultural contexts.""",
-        verbose=True,
-        allow_delegation=False,
-        llm=perplexity_llm,
-        max_iter=1,
-        memory=False
-    )
-    
-    # Telegram Publishing Agent
-    telegram_agent = Agent(
-        role='Content Publisher',
-        goal='Send formatted financial reports to Telegram with validation',
-        backstory="""You are a content publisher who manages digital distribution of financial 
-        intelligence. You ensure message quality, validate content, and handle delivery logistics.""",
-        verbose=True,
-        allow_delegation=False,
-        tools=[send_telegram_message],
-        llm=perplexity_llm,
-        max_iter=1,
-        memory=False
-    )
+    # Multilingual Translation Agents - one per language so the translations can run concurrently
+    translation_agents = {
+        language: Agent(
+            role=f'Financial Translator ({language})',
+            goal=f'Translate financial content to {language}',
+            backstory="""You are a professional financial translator with expertise in multilingual 
+            financial communications. You maintain technical accuracy while adapting content for 
+            different linguistic and cultural contexts.""",
+            verbose=True,
+            allow_delegation=False,
+            llm=perplexity_llm(f'translation:{language}'),
+            max_iter=1,
+            memory=False
+        )
+        for language in TRANSLATION_LANGUAGES
+    }
     
-    return search_agent, summary_agent, formatting_agent, translation_agent, telegram_agent
+    return search_agent, summary_agent, translation_agents
+
+def report_llm_usage():
+    """Print the run's token and cost breakdown per stage and append it to the usage history"""
+    print(f"🧮 {usage_tracker.summary()}")
+    try:
+        if usage_tracker.save(current_run_id):
+            history = usage_tracker.history_summary()
+            if history:
+                print(f"📚 {history}")
+    except Exception as e:
+        logger.warning(f"Could not save LLM usage history: {e}")
+
+def time_to_first_message(reports, since):
+    """Seconds from `since` to the first delivered message, overall and per language"""
+    per_language = {}
+    for report in reports:
+        if report.first_sent_at is None:
+            continue
+        language = report.results[0].message.language
+        per_language[language] = min(per_language.get(language, float('inf')), report.first_sent_at - since)
+    return min(per_language.values(), default=None), per_language
+
+def write_run_timeline():
+    """Print the per-stage latency breakdown and write the run's spans as JSON"""
+    print(f"⏱️ {timeline.summary()}")
+    try:
+        print(f"🗂️ Run timeline written to {timeline.write(current_run_id)}")
+    except OSError as e:
+        logger.warning(f"Could not write run timeline: {e}")
+
+def abandon_preview(preview):
+    """Replace a streamed preview that no final report will replace (the run failed) with a
+    short notice, so chats are not left with a half-written analysis"""
+    if preview is None:
+        return
+    llm_hooks.remove_stream_hook(preview.on_chunk)
+    try:
+        preview.abandon("⚠️ <i>Today's analysis could not be completed.</i>")
+    except Exception as e:
+        logger.warning(f"Could not replace the streaming preview: {e}")
+
+def export_run_trace():
+    """Export the run's spans as one OpenTelemetry trace (TRACE_EXPORTER)"""
+    try:
+        exported = export_trace(timeline, current_run_id)
+        if exported:
+            print(f"🔭 Run {exported}")
+    except Exception as e:
+        logger.warning(f"Could not export run trace: {e}")
 
 def main():
-    """Main execution with enhanced error handling and performance optimization"""
+    """Run the workflow inside the run's root span, then write its timing breakdown; True only
+    if every language was delivered"""
+    try:
+        start_metrics_server()
+    except OSError as e:
+        logger.warning(f"Metrics endpoint not started: {e}")
+    with timeline.span('run', 'run', run_id=current_run_id):
+        outcome = run_workflow()
+    RUNS.inc(status=outcome)
+    if outcome == 'success':
+        LAST_SUCCESS.set(time.time())
+    write_run_timeline()
+    export_run_trace()
+    return outcome == 'success'
+
+def run_workflow():
+    """Main execution with enhanced error handling and performance optimization.
+
+    Returns 'success' (every language delivered), 'partial' (some languages or messages still
+    undelivered after the last attempt) or 'failure'."""
+    run_started = time.time()
+    preview = None
     print("=" * 75)
     print("🏦 CREWAI + PERPLEXITY PRO FINANCIAL INTELLIGENCE SYSTEM")
     print("📊 Real-time Multi-Agent Market Analysis Platform")
@@ -207,26 +385,42 @@ def main():
         required_keys = {
             'PERPLEXITY_API_KEY': PERPLEXITY_API_KEY,
             'TELEGRAM_BOT_TOKEN': TELEGRAM_BOT_TOKEN,
-            'TELEGRAM_CHAT_ID': TELEGRAM_CHAT_ID
+            'TELEGRAM_CHAT_ID': TELEGRAM_TARGETS
         }
         
         missing_keys = [key for key, value in required_keys.items() if not value]
         if missing_keys:
             print(f"❌ Critical Error: Missing API keys: {', '.join(missing_keys)}")
             print("Required keys: PERPLEXITY_API_KEY, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID")
-            return False
+            return 'failure'
         
         print("✅ All API keys validated successfully")
         print(f"🔧 Configuration: Using {MODEL_NAME} via {LLM_PROVIDER}")
-        print("🤖 Initializing 5-agent workflow system...")
+        print(f"🆔 Run ID: {current_run_id}")
+        print(f"📡 Delivery targets: {len(TELEGRAM_TARGETS)} chat(s)")
+        
+        # Finish deliveries interrupted by an earlier crash before producing a new report
+        drain_outbound_queue()
+        
+        # Completed stages are checkpointed per run; retries and restarts with the same RUN_ID resume
+        prune_checkpoints()
+        checkpoint = RunCheckpoint(current_run_id)
+        if checkpoint.stages:
+            print(f"♻️ Resuming run {current_run_id}: {', '.join(checkpoint.stages)} already completed")
+        print(f"🤖 Initializing {2 + len(TRANSLATION_LANGUAGES)}-agent workflow system...")
+        
+        # The analysis is posted while it streams and edited as it grows; the final English
+        # report then replaces the preview instead of arriving as a second message
+        if STREAM_SUMMARY and not checkpoint.completed('summary'):
+            preview = StreamingPreview(dispatcher, TELEGRAM_TARGETS)
+            llm_hooks.add_stream_hook(preview.on_chunk)
         
         # Create specialized agents
-        search_agent, summary_agent, formatting_agent, translation_agent, telegram_agent = create_perplexity_agents()
+        search_agent, summary_agent, translation_agents = create_perplexity_agents()
         
         print("📋 Defining optimized workflow tasks...")
         
         # Task 1: Real-time Financial Research with Perplexity's search capabilities
-        wait_for_rate_limit()
         search_task = Task(
             description="""Research latest US financial market data using real-time search:
 
@@ -245,11 +439,11 @@ SEARCH REQUIREMENTS:
 
 DELIVERABLE: Current, data-rich market intelligence summary with specific numbers and actionable insights.""",
             agent=search_agent,
-            expected_output="Real-time financial market summary with current data, percentages, and key insights under 250 words"
+            expected_output="Real-time financial market summary with current data, percentages, and key insights under 250 words",
+            callback=timeline.task_callback('search', checkpoint.callback('search'))
         )
         
         # Task 2: Professional Financial Analysis
-        wait_for_rate_limit()
         summary_task = Task(
             description="""Transform research data into professional financial analysis:
 
@@ -277,101 +471,50 @@ QUALITY STANDARDS:
 
 DELIVERABLE: Structured, professional financial analysis exactly 300 words suitable for institutional distribution.""",
             agent=summary_agent,
-            expected_output="Professional 300-word financial analysis with clear structure and actionable insights"
+            expected_output="Professional 300-word financial analysis with clear structure and actionable insights",
+            callback=timeline.task_callback('summary', checkpoint.callback('summary'))
         )
         
-        # Task 3: HTML Formatting for Professional Presentation
-        wait_for_rate_limit()
-        formatting_task = Task(
-            description="""Format the financial analysis with professional HTML structure:
-
-FORMATTING REQUIREMENTS:
-1. Use <b> tags for section headers (MARKET OVERVIEW, KEY MOVERS & CATALYSTS, MARKET IMPLICATIONS)
-2. Use <i> tags for emphasis on key metrics and percentages
-3. Maintain clean, readable structure
-4. Preserve all numerical data and percentages
-5. Ensure proper HTML entity encoding
+        # Task 3: Multilingual Translation with Financial Accuracy - one task per language,
+        # run concurrently after the crew so each language can be published as soon as it is ready
+        translation_tasks = {
+            language: Task(
+                description=f"""Translate segments of the financial analysis to {language}:
 
-QUALITY STANDARDS:
-- Professional presentation suitable for institutional clients
-- Clear visual hierarchy with proper emphasis
-- Maintain all technical content and specific data
-- Ready for digital distribution
-
-DELIVERABLE: HTML-formatted financial analysis with professional structure and emphasis.""",
-            agent=formatting_agent,
-            expected_output="HTML-formatted financial analysis with professional structure and proper emphasis"
-        )
-        
-        # Task 4: Multilingual Translation with Financial Accuracy
-        wait_for_rate_limit()
-        translation_task = Task(
-            description="""Create concise translations of the formatted analysis:
+The context is a JSON object of numbered English segments (headings and sentences) that
+have not been translated before; the rest of the report comes from translation memory.
 
 TRANSLATION REQUIREMENTS:
-1. Translate to Arabic, Hindi, and Hebrew
-2. Maintain all HTML formatting tags unchanged
-3. Preserve all numerical values and percentages exactly
+1. Translate every segment to {language}, one translation per segment id
+2. Keep emoji and Markdown emphasis; do not add HTML
+3. Preserve all numerical values and percentages exactly, written with the same digits
 4. Keep financial terminology accurate
-5. Each translation should be approximately 150 words (condensed from English)
+5. Do not merge, split, condense or skip segments
 
 QUALITY STANDARDS:
-- Financial accuracy in all languages
-- Cultural appropriateness for each market
-- Consistent HTML formatting across languages
-- Professional tone maintained in translations
+- Financial accuracy
+- Cultural appropriateness for {language}-speaking markets
+- Consistent terminology across segments
+- Professional tone maintained
 
 OUTPUT FORMAT:
-Provide 3 separate translations, each clearly identified by language.
+Reply with a single JSON object and nothing else:
+{{"language": "{language}", "segments": {{"<id>": "<{language} translation>", ...}}}}
 
-DELIVERABLE: Three professional financial translations (Arabic, Hindi, Hebrew) with preserved formatting and accuracy.""",
-            agent=translation_agent,
-            expected_output="Three professional financial translations maintaining formatting and numerical accuracy"
-        )
-        
-        # Task 5: Intelligent Telegram Distribution
-        wait_for_rate_limit()
-        telegram_task = Task(
-            description="""Distribute financial analysis to Telegram in 4 separate messages:
-
-DISTRIBUTION WORKFLOW:
-1. Extract English content from formatting agent's output
-2. Extract Arabic translation from translation agent's output  
-3. Extract Hindi translation from translation agent's output
-4. Extract Hebrew translation from translation agent's output
-
-SEND SEQUENCE:
-1. send_telegram_message(english_content, "English")
-2. send_telegram_message(arabic_content, "Arabic")  
-3. send_telegram_message(hindi_content, "Hindi")
-4. send_telegram_message(hebrew_content, "Hebrew")
-
-QUALITY ASSURANCE:
-- Validate content before sending each message
-- Ensure proper formatting in each language
-- Confirm successful delivery of all messages
-- Handle any delivery failures gracefully
-
-DELIVERABLE: Confirmation of successful delivery of all 4 language versions to Telegram channel.""",
-            agent=telegram_agent,
-            expected_output="Confirmation of successful delivery of all 4 financial analysis messages (English, Arabic, Hindi, Hebrew) to Telegram"
-        )
-        
-        print("⚙️ Assembling advanced 5-agent workflow...")
+DELIVERABLE: Professional {language} translation of every segment with preserved numbers and accuracy.""",
+                agent=translation_agents[language],
+                expected_output=f"JSON object with the {language} translation of every segment id",
+                output_pydantic=SegmentTranslations  # validated by CrewAI; parse_segment_translations() repairs what it cannot
+            )
+            for language in TRANSLATION_LANGUAGES
+        }
         
-        # Create optimized crew with sequential processing
-        financial_crew = Crew(
-            agents=[search_agent, summary_agent, formatting_agent, translation_agent, telegram_agent],
-            tasks=[search_task, summary_task, formatting_task, translation_task, telegram_task],
-            process=Process.sequential,
-            verbose=True,
-            memory=False,  # Optimized for performance
-            max_rpm=4      # Rate limiting for API protection
-        )
+        print("⚙️ Assembling advanced research & analysis crew...")
+        crew_stages = [('search', search_task), ('summary', summary_task)]
         
         print("🚀 Launching advanced CrewAI + Perplexity Pro execution...")
         print("⏱️ Estimated completion time: 4-6 minutes with rate limiting")
-        print("📊 Processing: Real-time data → Analysis → Formatting → Translation → Distribution")
+        print("📊 Processing: Real-time data → Analysis → Parallel translations → Formatting & Distribution (no LLM)")
         print("-" * 75)
         
         # Execute with comprehensive error handling
@@ -381,20 +524,134 @@ DELIVERABLE: Confirmation of successful delivery of all 4 language versions to T
             try:
                 print(f"\n🔄 Workflow execution attempt {attempt + 1}/{max_attempts}")
                 
-                # Execute the complete CrewAI + Perplexity workflow
+                # Execute the CrewAI + Perplexity workflow from the first stage without a checkpoint
                 start_time = time.time()
-                workflow_result = financial_crew.kickoff()
+                remaining_tasks = resume_tasks(crew_stages, checkpoint)
+                if len(remaining_tasks) < len(crew_stages):
+                    print(f"♻️ Skipping {len(crew_stages) - len(remaining_tasks)} checkpointed crew stage(s)")
+                try:
+                    if remaining_tasks:
+                        # Create optimized crew with sequential processing
+                        financial_crew = Crew(
+                            agents=[task.agent for task in remaining_tasks],
+                            tasks=remaining_tasks,
+                            process=Process.sequential,
+                            verbose=True,
+                            memory=False  # Optimized for performance
+                            # No fixed max_rpm: pacing is adaptive and driven by provider headers (see rate_limiter.py)
+                        )
+                        timeline.start_sequence()
+                        financial_crew.kickoff()
+                finally:
+                    # Stop streaming even if the crew failed; a retry reuses the preview messages
+                    # (the final report still replaces them) but no longer edits them live
+                    if preview is not None:
+                        preview.close()
+                        llm_hooks.remove_stream_hook(preview.on_chunk)
+                if preview is not None:
+                    preview_summary = preview.summary(run_started)
+                    if preview_summary:
+                        print(f"✍️ {preview_summary}")
+                analysis = checkpoint.get('summary') or summary_task.output.raw
+                
+                if not analysis or not analysis.strip():
+                    raise ValueError('Analysis stage produced an empty English report')
+                
+                # DAG after the analysis: English delivery and the translations run as parallel
+                # branches. Formatting and publishing need no LLM; each translation is published
+                # the moment it finishes, but never before English, so every chat gets English first
+                english_branch = ThreadPoolExecutor(max_workers=1, thread_name_prefix='publish-english')
+                english_future = english_branch.submit(publish_language, 'English', analysis,
+                                                       replace=preview.message_ids if preview else None)
+                english_branch.shutdown(wait=False)
+                delivery_reports = []
+                
+                def publish_translation(result):
+                    if not result.ok:
+                        print(f"⚠️ {result}")
+                        return
+                    english_future.result()
+                    report = publish_language(result.language, result.text)
+                    if report is not None:
+                        delivery_reports.append(report)
+                
+                def translate(language):
+                    stage = f'translation:{language}'
+                    if checkpoint.completed(stage):
+                        return checkpoint.get(stage)
+                    with timeline.span(stage, 'task', stage=stage):
+                        text = translate_analysis(analysis, language, translation_tasks[language], translation_agents[language])
+                    checkpoint.save(stage, text)
+                    return text
+                
+                # Bounded by the provider's burst so concurrent calls are not just queued by the limiter
+                translation_started = time.time()
+                translation_results = translate_concurrently(
+                    translate,
+                    max_workers=TRANSLATION_CONCURRENCY or int(rate_limiters.bucket(LLM_PROVIDER).capacity),
+                    on_result=publish_translation
+                )
+                translation_time = time.time() - translation_started
+                english_report = english_future.result()
+                if english_report is not None:
+                    delivery_reports.insert(0, english_report)
+                    if english_report.sent:
+                        preview = None  # the English report has replaced it
+                first_message, first_by_language = time_to_first_message(delivery_reports, run_started)
+                if first_message is not None:
+                    timeline.record_first_message(first_message, first_by_language)
+                    observe_first_message(first_message, first_by_language)
+                    print(f"⏱️ Time to first message: {first_message:.1f}s "
+                          f"({', '.join(f'{language} {seconds:.1f}s' for language, seconds in first_by_language.items())})")
+                failed_languages = [result.language for result in translation_results if not result.ok]
+                for language in failed_languages:
+                    TRANSLATION_FAILURES.inc(language=language)
+                failed_messages = sum(len(report.failed) for report in delivery_reports)
+                problems = []
+                if failed_languages:
+                    problems.append(f"Translation failed for {', '.join(failed_languages)}")
+                if failed_messages:
+                    problems.append(f"{failed_messages} Telegram messages failed")
+                if problems and attempt < max_attempts - 1:
+                    # Only the failed languages and messages are redone; everything else resumes
+                    # from checkpoints and the outbound queue
+                    raise RuntimeError('; '.join(problems))
                 execution_time = time.time() - start_time
                 
+                if problems:
+                    # Out of attempts with languages still missing: not a successful report
+                    print("\n" + "=" * 75)
+                    print("⚠️ WORKFLOW FINISHED WITH UNDELIVERED LANGUAGES")
+                    print("=" * 75)
+                    print(f"❌ {'; '.join(problems)}")
+                    print(f"⏱️ Total execution time: {execution_time:.1f} seconds")
+                    for result in translation_results:
+                        print(f"   🌐 {result}")
+                    print(f"🗄️ {llm_cache.summary()}")
+                    report_llm_usage()
+                    abandon_preview(preview)
+                    return 'partial'
+                
                 # Success celebration
                 print("\n" + "=" * 75)
                 print("🎉 CREWAI + PERPLEXITY WORKFLOW COMPLETED SUCCESSFULLY!")
                 print("=" * 75)
                 print(f"✅ Total execution time: {execution_time:.1f} seconds")
+                if first_message is not None:
+                    print(f"✅ Time to first message (English latency): {first_by_language.get('English', first_message):.1f} seconds")
                 print(f"✅ Completion timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S IST')}")
-                print("🤖 5-Agent Multi-Agent System: FULLY OPERATIONAL")
+                telegram_timing = telegram.timing_summary()
+                if telegram_timing:
+                    print(f"📡 Telegram connection timing: {json.dumps(telegram_timing)}")
+                print(f"🗄️ {llm_cache.summary()}")
+                report_llm_usage()
+                print(f"🤖 {2 + len(TRANSLATION_LANGUAGES)}-Agent Multi-Agent System: FULLY OPERATIONAL")
                 print("📊 Real-time Financial Data Processing: SUCCESSFUL")
-                print("🌐 Multilingual Content Generation: COMPLETED")
+                for result in translation_results:
+                    print(f"   🌐 {result}")
+                print(f"🌐 Multilingual Content Generation: {sum(r.ok for r in translation_results)}/"
+                      f"{len(translation_results)} languages in {translation_time:.1f}s wall clock "
+                      f"({sum(r.latency for r in translation_results):.1f}s if run one after another)")
                 print("📱 Professional Telegram Distribution: CONFIRMED")
                 print("⚡ Advanced Rate Limiting: OPTIMIZED")
                 
@@ -412,7 +669,7 @@ DELIVERABLE: Confirmation of successful delivery of all 4 language versions to T
                 print("📊 Achievement: Advanced Financial Intelligence Platform")
                 print("🌐 Innovation: Real-time Multilingual Financial Content Generation")
                 
-                return True
+                return 'success'
                 
             except Exception as execution_error:
                 error_message = str(execution_error)
@@ -439,7 +696,9 @@ DELIVERABLE: Confirmation of successful delivery of all 4 language versions to T
                     else:
                         break
         
-        print("\n🚨 Workflow execution requires technical optimization")
+        print(f"\n🗄️ {llm_cache.summary()}")
+        report_llm_usage()
+        print("🚨 Workflow execution requires technical optimization")
         print("💡 Your system demonstrates advanced capabilities:")
         print("   • ✅ CrewAI multi-agent orchestration")
         print("   • ✅ Perplexity Pro real-time data integration")
@@ -450,12 +709,14 @@ DELIVERABLE: Confirmation of successful delivery of all 4 language versions to T
         print("\n📧 SUBMIT YOUR PROJECT - IT'S ALREADY IMPRESSIVE!")
         print("Your implementation showcases professional-grade AI workflow engineering.")
         
-        return False
+        abandon_preview(preview)
+        return 'failure'
         
     except Exception as critical_error:
         logger.error(f"Critical system failure: {critical_error}")
         print(f"\n🚨 Critical System Error: {critical_error}")
-        return False
+        abandon_preview(preview)
+        return 'failure'
 
 if __name__ == "__main__":
     # Environment validation
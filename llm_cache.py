@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+LLM_CACHE_DB = os.getenv('LLM_CACHE_DB', os.path.join('state', 'llm_cache.db'))
+# Freshness window: identical requests in the same window share a response (market data goes stale)
+LLM_CACHE_BUCKET_SECONDS = float(os.getenv('LLM_CACHE_BUCKET_SECONDS', '600'))
+# Least recently used responses are evicted beyond this total size
+LLM_CACHE_MAX_BYTES = int(os.getenv('LLM_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+
+# Request parameters that change the completion; credentials, timeouts and metadata do not
+_KEY_PARAMS = (
+    'model', 'messages', 'temperature', 'top_p', 'max_tokens', 'max_completion_tokens', 'stop', 'n', 'seed',
+    'presence_penalty', 'frequency_penalty', 'tools', 'tool_choice', 'functions', 'function_call',
+    'response_format', 'reasoning_effort', 'web_search_options', 'search_domain_filter',
+    'search_recency_filter', 'return_images', 'return_related_questions'
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+def prompt_hash(kwargs):
+    """SHA-256 over the completion-relevant request parameters"""
+    relevant = {name: kwargs[name] for name in _KEY_PARAMS if kwargs.get(name) is not None}
+    encoded = json.dumps(relevant, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """Persistent LiteLLM completion cache in SQLite (WAL).
+
+    Keys are (model, freshness bucket, prompt hash); the bucket is the current time divided
+    by bucket_seconds, so a response is reused only by identical requests made in the same
+    window. Streaming requests are not cached. Beyond max_bytes the least recently used
+    responses are evicted, and responses from past buckets are dropped when new ones are
+    stored. Hit/miss counters cover the current process.
+    """
+
+    def __init__(self, path=LLM_CACHE_DB, bucket_seconds=LLM_CACHE_BUCKET_SECONDS, max_bytes=LLM_CACHE_MAX_BYTES,
+                 enabled=LLM_CACHE_ENABLED):
+        self.path = path
+        self.bucket_seconds = bucket_seconds
+        self.max_bytes = max_bytes
+        self.enabled = enabled and bucket_seconds > 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0   # provider latency the hits would have cost
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if self.enabled:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connect().execute(_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def bucket(self, now=None):
+        return int((now if now is not None else time.time()) // self.bucket_seconds)
+
+    def key(self, kwargs, now=None):
+        return f"{kwargs.get('model', '')}:{self.bucket(now)}:{prompt_hash(kwargs)}"
+
+    def _count(self, **counters):
+        with self._lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def get(self, kwargs):
+        """The cached response dict for a request in the current bucket, or None"""
+        if not self.enabled or kwargs.get('stream'):
+            return None
+        key = self.key(kwargs)
+        conn = self._connect()
+        row = conn.execute('SELECT response FROM llm_cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self._count(misses=1)
+            return None
+        conn.execute('UPDATE llm_cache SET last_used = ?, hits = hits + 1 WHERE key = ?', (time.time(), key))
+        data = json.loads(row[0])
+        self._count(hits=1, saved_seconds=data.pop('_elapsed', 0.0) or 0.0)
+        return data
+
+    def put(self, kwargs, data, elapsed=None):
+        """Store a response dict for a request; evicts past buckets and LRU entries over max_bytes"""
+        if not self.enabled or kwargs.get('stream'):
+            return
+        now = time.time()
+        payload = json.dumps(dict(data, _elapsed=elapsed), ensure_ascii=False, default=str)
+        size = len(payload.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO llm_cache (key, model, bucket, response, size, created_at, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (self.key(kwargs, now), kwargs.get('model', ''), self.bucket(now), payload, size, now, now)
+            )
+            evicted = conn.execute('DELETE FROM llm_cache WHERE bucket < ?', (self.bucket(now),)).rowcount
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM llm_cache').fetchone()[0]
+            if total > self.max_bytes:
+                # Walk from least recently used until enough bytes are freed
+                excess, doomed = total - self.max_bytes, []
+                for key, entry_size in conn.execute('SELECT key, size FROM llm_cache ORDER BY last_used'):
+                    if excess <= 0:
+                        break
+                    doomed.append((key,))
+                    excess -= entry_size
+                conn.executemany('DELETE FROM llm_cache WHERE key = ?', doomed)
+                evicted += len(doomed)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._count(stores=1, evictions=evicted)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        stats = {
+            'hits': self.hits, 'misses': self.misses, 'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'stores': self.stores, 'evictions': self.evictions, 'saved_seconds': round(self.saved_seconds, 1),
+        }
+        if self.enabled:
+            entries, size = self._connect().execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache').fetchone()
+            stats.update(entries=entries, bytes=size)
+        return stats
+
+    def summary(self):
+        if not self.enabled:
+            return 'LLM cache disabled'
+        stats = self.stats()
+        return (f"LLM cache: {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%}), "
+                f"~{stats['saved_seconds']:.0f}s of provider time saved, {stats['entries']} entries "
+                f"({stats['bytes'] / 1024:.0f} KiB), {stats['evictions']} evicted")
+
+
+def _response_dict(response):
+    if hasattr(response, 'model_dump'):
+        return response.model_dump()
+    if hasattr(response, 'to_dict'):
+        return response.to_dict()
+    return dict(response)
+
+
+def _response_from_dict(data):
+    import litellm
+
+    response = litellm.ModelResponse(**data)
+    response._hidden_params['cache_hit'] = True
+    return response
+
+
+llm_cache = LLMResponseCache()
+
+
+def lookup_cached_response(call):
+    """llm_hooks lookup hook: answer a request from the cache"""
+    data = llm_cache.get(call.kwargs)
+    if data is None:
+        return None
+    logger.info(f"LLM cache hit for {call.model}")
+    return _response_from_dict(data)
+
+
+def cache_llm_response(call, response):
+    """llm_hooks post-call hook: remember a completed (non-streaming) response"""
+    if call.stream or not getattr(response, 'choices', None):
+        return
+    llm_cache.put(call.kwargs, _response_dict(response), elapsed=call.elapsed)
@@ -0,0 +1,248 @@
+import time
+import inspect
+import logging
+import functools
+
+from rate_limiter import provider_from_model
+
+logger = logging.getLogger(__name__)
+
+# Hooks run around every LiteLLM completion, i.e. at the point a request actually leaves the process
+_lookup_hooks = []     # called with an LLMCall first; a non-None result is returned without sending
+_pre_call_hooks = []   # (sync_fn, async_fn) pairs, called with an LLMCall before sending
+_post_call_hooks = []  # called with (LLMCall, response) after a successful call
+_error_hooks = []      # called with (LLMCall, exception) when the call raises
+_stream_hooks = []     # called with (LLMCall, text delta) for every chunk of a streamed response
+_completion_hooks = [] # called with (LLMCall, complete response) once the whole reply has arrived
+_installed = False
+
+
+class LLMCall:
+    """Bookkeeping for one LiteLLM completion request"""
+
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+        self.model = kwargs.get('model', '')
+        self.provider = kwargs.get('custom_llm_provider') or provider_from_model(self.model)
+        self.stream = bool(kwargs.get('stream'))
+        self.metadata = kwargs.get('metadata') or {}
+        self.started = None
+        self.elapsed = None
+        self.cache_hit = False
+
+
+def add_lookup_hook(fn):
+    """Register a hook that may answer a request locally (e.g. from a cache); when it returns a
+    response, the rate limiter and the other hooks are skipped and nothing is sent"""
+    _lookup_hooks.append(fn)
+
+
+def add_pre_call_hook(fn, async_fn=None):
+    """Register a hook run before each request; async_fn is used from acompletion() if given"""
+    _pre_call_hooks.append((fn, async_fn))
+
+
+def add_post_call_hook(fn):
+    _post_call_hooks.append(fn)
+
+
+def add_error_hook(fn):
+    _error_hooks.append(fn)
+
+
+def add_stream_hook(fn):
+    """Register a hook that sees streamed responses as they arrive, one text delta at a time"""
+    _stream_hooks.append(fn)
+
+
+def remove_stream_hook(fn):
+    if fn in _stream_hooks:
+        _stream_hooks.remove(fn)
+
+
+def add_completion_hook(fn):
+    """Register a hook that sees every complete response, including cache hits and streamed
+    replies (called at the end of the stream with the chunks assembled, call.elapsed covering
+    the whole stream); the place for usage accounting"""
+    _completion_hooks.append(fn)
+
+
+def _run_completion(call, response):
+    for hook in _completion_hooks:
+        try:
+            hook(call, response)
+        except Exception as e:
+            logger.warning(f"LLM completion hook failed: {e}")
+
+
+def _assemble_stream(call, chunks):
+    import litellm
+
+    return litellm.stream_chunk_builder(chunks, messages=call.kwargs.get('messages'))
+
+
+def _chunk_text(chunk):
+    try:
+        return chunk.choices[0].delta.content or ''
+    except (AttributeError, IndexError, TypeError):
+        return ''
+
+
+class _StreamTap:
+    """Passes a streamed response through unchanged while feeding each delta to the stream hooks;
+    the completion hooks get the assembled response once the stream is exhausted"""
+
+    def __init__(self, call, stream):
+        self._call = call
+        self._stream = stream
+        self._chunks = []
+
+    def _finish(self):
+        self._call.elapsed = time.time() - self._call.started
+        if _completion_hooks:
+            try:
+                response = _assemble_stream(self._call, self._chunks)
+            except Exception as e:
+                logger.warning(f"Could not assemble streamed response: {e}")
+                return
+            _run_completion(self._call, response)
+
+    def _feed(self, chunk):
+        self._chunks.append(chunk)
+        text = _chunk_text(chunk)
+        if text:
+            for hook in _stream_hooks:
+                try:
+                    hook(self._call, text)
+                except Exception as e:
+                    logger.warning(f"LLM stream hook failed: {e}")
+        return chunk
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            chunk = next(self._stream)
+        except StopIteration:
+            self._finish()
+            raise
+        return self._feed(chunk)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            chunk = await self._stream.__anext__()
+        except StopAsyncIteration:
+            self._finish()
+            raise
+        return self._feed(chunk)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def _deliver(call, response):
+    """Hand a provider response to the post-call hooks and return it to the caller"""
+    _run_post_call(call, response)
+    if call.stream:
+        return _StreamTap(call, response) if _stream_hooks or _completion_hooks else response
+    _run_completion(call, response)
+    return response
+
+
+def _run_lookup(call):
+    for hook in _lookup_hooks:
+        try:
+            response = hook(call)
+        except Exception as e:
+            logger.warning(f"LLM lookup hook failed: {e}")
+            continue
+        if response is not None:
+            call.cache_hit = True
+            return response
+    return None
+
+
+def _run_post_call(call, response):
+    for hook in _post_call_hooks:
+        try:
+            hook(call, response)
+        except Exception as e:
+            logger.warning(f"LLM post-call hook failed: {e}")
+
+
+def _run_error(call, error):
+    for hook in _error_hooks:
+        try:
+            hook(call, error)
+        except Exception as e:
+            logger.warning(f"LLM error hook failed: {e}")
+
+
+def _wrap_completion(completion):
+    @functools.wraps(completion)
+    def wrapper(*args, **kwargs):
+        call = LLMCall(kwargs)
+        response = _run_lookup(call)
+        if response is not None:
+            _run_completion(call, response)
+            return response
+        for fn, _ in _pre_call_hooks:
+            fn(call)
+        call.started = time.time()
+        try:
+            response = completion(*args, **kwargs)
+        except Exception as e:
+            call.elapsed = time.time() - call.started
+            _run_error(call, e)
+            raise
+        call.elapsed = time.time() - call.started
+        return _deliver(call, response)
+    wrapper.__financial_bot_hooked__ = True
+    return wrapper
+
+
+def _wrap_acompletion(acompletion):
+    @functools.wraps(acompletion)
+    async def wrapper(*args, **kwargs):
+        call = LLMCall(kwargs)
+        response = _run_lookup(call)
+        if response is not None:
+            _run_completion(call, response)
+            return response
+        for fn, async_fn in _pre_call_hooks:
+            if async_fn is not None:
+                await async_fn(call)
+            else:
+                fn(call)
+        call.started = time.time()
+        try:
+            response = await acompletion(*args, **kwargs)
+        except Exception as e:
+            call.elapsed = time.time() - call.started
+            _run_error(call, e)
+            raise
+        call.elapsed = time.time() - call.started
+        return _deliver(call, response)
+    wrapper.__financial_bot_hooked__ = True
+    return wrapper
+
+
+def install():
+    """Patch litellm.completion/acompletion so every request passes through the registered hooks"""
+    global _installed
+    if _installed:
+        return
+    import litellm
+
+    # Expose provider headers (x-ratelimit-*, retry-after) on responses for the adaptive limiter
+    litellm.return_response_headers = True
+    if not getattr(litellm.completion, '__financial_bot_hooked__', False):
+        litellm.completion = _wrap_completion(litellm.completion)
+    if inspect.iscoroutinefunction(litellm.acompletion) and not getattr(litellm.acompletion, '__financial_bot_hooked__', False):
+        litellm.acompletion = _wrap_acompletion(litellm.acompletion)
+    _installed = True
+    logger.info("LiteLLM request hooks installed")
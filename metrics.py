@@ -0,0 +1,225 @@
+import os
+import math
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Port of the Prometheus /metrics endpoint; 0 disables it
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _suffix(self):
+        return ''
+
+    def samples(self):
+        """(name suffix, label values, extra labels, value) per sample; one per label set by default"""
+        with self._lock:
+            return [(self._suffix(), key, (), value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for suffix, labels, extra, value in self.samples():
+            lines.append(f'{self.name}{suffix}{_labels(self.labelnames, labels, extra)} {_number(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _suffix(self):
+        return '' if self.name.endswith('_total') else '_total'
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60)):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                for bound, count in zip(self.buckets, counts):
+                    samples.append(('_bucket', key, (('le', _number(bound)),), count))
+                samples.append(('_sum', key, (), total))
+                samples.append(('_count', key, (), counts[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=None):
+        return self._register(Histogram(name, documentation, labelnames, **({'buckets': buckets} if buckets else {})))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        return '\n'.join(metric.render() for metric in self.metrics) + '\n'
+
+
+registry = MetricsRegistry()
+
+LLM_LATENCY = registry.histogram(
+    'financial_bot_llm_latency_seconds', 'LiteLLM completion latency per agent stage',
+    ['stage', 'model'], buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+)
+LLM_TOKENS = registry.counter('financial_bot_llm_tokens_total', 'LLM tokens per agent stage', ['stage', 'kind'])
+RATE_LIMIT_WAIT = registry.histogram(
+    'financial_bot_rate_limit_wait_seconds', 'Time spent waiting for the LLM rate limiter or Telegram pacing',
+    ['limiter', 'stage'], buckets=(0.05, 0.25, 1, 2, 5, 10, 15, 30, 60)
+)
+TELEGRAM_LATENCY = registry.histogram(
+    'financial_bot_telegram_request_seconds', 'Telegram Bot API request latency',
+    ['method', 'status'], buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+TELEGRAM_MESSAGE_SIZE = registry.histogram(
+    'financial_bot_telegram_message_characters', 'Characters per Telegram message sent or edited',
+    ['stage'], buckets=(256, 512, 1024, 2048, 3072, 4096)
+)
+MESSAGE_SPLITS = registry.counter(
+    'financial_bot_message_splits_total', 'Reports too long for one Telegram message, split instead of truncated',
+    ['language']
+)
+DELIVERY_FAILURES = registry.counter(
+    'financial_bot_delivery_failures_total', 'Telegram messages that failed after all attempts', ['language']
+)
+TRANSLATION_FAILURES = registry.counter(
+    'financial_bot_translation_failures_total', 'Translations that failed', ['language']
+)
+TIME_TO_FIRST_MESSAGE = registry.histogram(
+    'financial_bot_time_to_first_message_seconds',
+    'Seconds from the start of a run to its first accepted Telegram message, per language and overall (any)',
+    ['language'], buckets=(5, 10, 20, 30, 45, 60, 90, 120, 180, 300)
+)
+RUNS = registry.counter('financial_bot_runs_total', 'Workflow runs by outcome (success, partial, failure)', ['status'])
+LAST_SUCCESS = registry.gauge(
+    'financial_bot_last_success_timestamp_seconds', 'Unix time of the last run that delivered every language'
+)
+
+
+def observe_first_message(overall, by_language):
+    """Record a run's time to first message, overall and per language"""
+    TIME_TO_FIRST_MESSAGE.observe(overall, language='any')
+    for language, seconds in by_language.items():
+        TIME_TO_FIRST_MESSAGE.observe(seconds, language=language)
+
+
+def observe_span(span):
+    """run_timeline listener: turn finished LLM, rate-limit and Telegram spans into metrics"""
+    stage = span.stage or 'unattributed'
+    attributes = span.attributes
+    if span.category == 'llm':
+        if attributes.get('cache_hit'):
+            return
+        LLM_LATENCY.observe(span.duration, stage=stage, model=attributes.get('model', ''))
+        for kind in ('prompt', 'completion'):
+            if attributes.get(f'{kind}_tokens'):
+                LLM_TOKENS.inc(attributes[f'{kind}_tokens'], stage=stage, kind=kind)
+    elif span.category == 'rate_limit':
+        limiter = 'telegram' if span.name.startswith('telegram') else attributes.get('provider', 'llm')
+        RATE_LIMIT_WAIT.observe(span.duration, limiter=limiter, stage=stage)
+    elif span.category == 'telegram':
+        method = span.name.split(' ', 1)[-1]
+        TELEGRAM_LATENCY.observe(span.duration, method=method, status=attributes.get('status_code') or 'error')
+        if attributes.get('characters') is not None:
+            TELEGRAM_MESSAGE_SIZE.observe(attributes['characters'], stage=stage)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', _CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Serve /metrics from a daemon thread (scrapes never wait on the pipeline); None if disabled"""
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    logger.info(f"Prometheus metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,202 @@
+import os
+import time
+import socket
+import sqlite3
+import logging
+import threading
+
+from telegram_dispatcher import OutgoingMessage
+
+logger = logging.getLogger(__name__)
+
+OUTBOUND_QUEUE_DB = os.getenv('OUTBOUND_QUEUE_DB', os.path.join('state', 'outbound_queue.db'))
+# Pending messages older than this are not replayed after a crash (a stale report is worse than none)
+OUTBOUND_QUEUE_MAX_AGE = float(os.getenv('OUTBOUND_QUEUE_MAX_AGE', str(6 * 3600)))
+# Seconds a process owns the pending messages it is delivering; other processes skip them
+# until the lease runs out (i.e. the owner crashed mid-delivery)
+OUTBOUND_QUEUE_LEASE = float(os.getenv('OUTBOUND_QUEUE_LEASE', '900'))
+# Delivery attempts (over all runs and drains) after which a message is given up as 'failed'
+OUTBOUND_QUEUE_MAX_ATTEMPTS = int(os.getenv('OUTBOUND_QUEUE_MAX_ATTEMPTS', '15'))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbound_messages (
+    run_id TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    thread_id INTEGER NOT NULL DEFAULT 0,
+    language TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    chunk_count INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    parse_mode TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    message_id INTEGER,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    sent_at REAL,
+    owner TEXT,
+    leased_until REAL,
+    PRIMARY KEY (run_id, chat_id, thread_id, language, chunk_index)
+)
+"""
+_KEY = 'run_id = ? AND chat_id = ? AND thread_id = ? AND language = ? AND chunk_index = ?'
+
+
+class OutboundQueue:
+    """Durable outbound Telegram queue in SQLite (WAL) with idempotency keys.
+
+    Every message is keyed by (run id, chat, topic, language, chunk index). A language is
+    enqueued only once per run and chat, so a retried workflow cannot post it twice:
+    delivery is at-least-once per key and keys already marked sent are never dispatched again.
+
+    Pending messages are claimed with a lease before they are dispatched, so several bot
+    processes sharing the queue never send the same message concurrently. Messages Telegram
+    rejects for good, or that run out of attempts, are marked 'failed' and never claimed again.
+    """
+
+    def __init__(self, path=OUTBOUND_QUEUE_DB, owner=None, lease=OUTBOUND_QUEUE_LEASE):
+        self.path = path
+        self.owner = owner or f'{socket.gethostname()}:{os.getpid()}'
+        self.lease = lease
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        conn = self._connect()
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(outbound_messages)')]
+        if columns and 'thread_id' not in columns:
+            # Queues created before multi-chat delivery were keyed without the chat
+            conn.execute('ALTER TABLE outbound_messages RENAME TO outbound_messages_single_chat')
+        elif columns and 'leased_until' not in columns:
+            conn.execute('ALTER TABLE outbound_messages ADD COLUMN owner TEXT')
+            conn.execute('ALTER TABLE outbound_messages ADD COLUMN leased_until REAL')
+        conn.execute(_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, run_id, messages):
+        """Store a run's messages; (chat, topic, language) groups already queued for this run
+        are left untouched.
+
+        Returns the messages that are (still) pending for the groups passed in, claimed for
+        this process; messages another live process is delivering are left to it.
+        """
+        groups = {(str(m.chat_id), m.thread_id or 0, m.language) for m in messages}
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            queued = {
+                row for row in conn.execute(
+                    'SELECT DISTINCT chat_id, thread_id, language FROM outbound_messages WHERE run_id = ?', (run_id,)
+                ) if row in groups
+            }
+            now = time.time()
+            conn.executemany(
+                'INSERT OR IGNORE INTO outbound_messages '
+                '(run_id, chat_id, thread_id, language, chunk_index, chunk_count, text, parse_mode, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (run_id, str(m.chat_id), m.thread_id or 0, m.language, m.chunk_index, m.chunk_count,
+                     m.text, m.parse_mode, now)
+                    for m in messages if (str(m.chat_id), m.thread_id or 0, m.language) not in queued
+                ]
+            )
+            claimed = self._claim(conn, run_id=run_id, groups=groups)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if queued:
+            logger.info(f"Outbound queue: {len(queued)} chat/language groups already queued for run {run_id}")
+        return claimed
+
+    def claim(self, exclude_run_id=None, max_age=None):
+        """Atomically lease the pending messages no live process is delivering, oldest first
+        (optionally skipping one run, e.g. the one this process is working on)"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            claimed = self._claim(conn, exclude_run_id=exclude_run_id, max_age=max_age)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return claimed
+
+    def _claim(self, conn, run_id=None, groups=None, exclude_run_id=None, max_age=None):
+        """Lease claimable pending rows inside the caller's write transaction"""
+        now = time.time()
+        query = ("SELECT * FROM outbound_messages WHERE status = 'pending' "
+                 "AND (leased_until IS NULL OR leased_until < ? OR owner = ?)")
+        params = [now, self.owner]
+        if run_id is not None:
+            query += ' AND run_id = ?'
+            params.append(run_id)
+        if exclude_run_id is not None:
+            query += ' AND run_id != ?'
+            params.append(exclude_run_id)
+        if max_age is not None:
+            query += ' AND created_at >= ?'
+            params.append(now - max_age)
+        query += ' ORDER BY created_at, run_id, chunk_index, language, chat_id, thread_id'
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.row_factory = None
+        messages = [self._to_message(row) for row in rows]
+        if groups is not None:
+            messages = [m for m in messages if (m.chat_id, m.thread_id or 0, m.language) in groups]
+        conn.executemany(
+            f'UPDATE outbound_messages SET owner = ?, leased_until = ? WHERE {_KEY}',
+            [(self.owner, now + self.lease) + m.key for m in messages]
+        )
+        return messages
+
+    @staticmethod
+    def _to_message(row):
+        return OutgoingMessage(row['chat_id'], row['text'], language=row['language'], parse_mode=row['parse_mode'],
+                               chunk_index=row['chunk_index'], chunk_count=row['chunk_count'], run_id=row['run_id'],
+                               thread_id=row['thread_id'] or None)
+
+    def record_many(self, results):
+        """Persist a batch of delivery outcomes in one transaction (broadcasts produce thousands)"""
+        now = time.time()
+        sent = [(r.attempts, r.message_id, now) + r.message.key for r in results if r.ok]
+        failed = [
+            (r.attempts, r.description, int(not r.retryable), r.attempts, OUTBOUND_QUEUE_MAX_ATTEMPTS) + r.message.key
+            for r in results if not r.ok
+        ]
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                f"UPDATE outbound_messages SET status = 'sent', attempts = attempts + ?, message_id = ?, sent_at = ?, "
+                f"leased_until = NULL WHERE {_KEY}", sent
+            )
+            # Failed messages are released so a retry (of any process) can claim them again, unless
+            # Telegram rejected them for good (bad markup, unknown chat) or they ran out of attempts
+            conn.executemany(
+                f"UPDATE outbound_messages SET attempts = attempts + ?, last_error = ?, owner = NULL, "
+                f"leased_until = NULL, status = CASE WHEN ? OR attempts + ? >= ? THEN 'failed' ELSE 'pending' END "
+                f"WHERE {_KEY}", failed
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def expire(self, max_age=OUTBOUND_QUEUE_MAX_AGE):
+        """Mark pending messages older than max_age as expired; returns how many"""
+        cursor = self._connect().execute(
+            "UPDATE outbound_messages SET status = 'expired' WHERE status = 'pending' AND created_at < ?",
+            (time.time() - max_age,)
+        )
+        return cursor.rowcount
@@ -0,0 +1,344 @@
+import os
+import re
+import time
+import sqlite3
+import asyncio
+import tempfile
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Default pacing: one request every RATE_LIMIT_DELAY seconds, with a small burst allowance
+RATE_LIMIT_DELAY = float(os.getenv('RATE_LIMIT_DELAY', '15'))
+RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', '2'))
+# Bounds for adaptive pacing driven by provider rate-limit headers
+RATE_LIMIT_MIN_DELAY = float(os.getenv('RATE_LIMIT_MIN_DELAY', '1'))
+RATE_LIMIT_MAX_DELAY = float(os.getenv('RATE_LIMIT_MAX_DELAY', '60'))
+# 'memory' keeps budgets per process; 'sqlite' shares them between all bot processes on the host
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_DB = os.getenv('RATE_LIMIT_DB', os.path.join(tempfile.gettempdir(), 'financial_bot_rate_limits.db'))
+
+
+class TokenBucket:
+    """Thread-safe token bucket with reservation semantics.
+
+    Callers reserve tokens immediately (the balance may go negative) and then sleep
+    for their own share of the debt, so waiters are served in arrival order without
+    polling. The same bucket can be used from threads and from asyncio code.
+    """
+
+    def __init__(self, rate, capacity, name='default'):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        self.name = name
+        self.rate = float(rate)          # tokens per second
+        self.capacity = float(capacity)  # burst size
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def reserve(self, tokens=1):
+        """Reserve tokens and return how many seconds the caller must wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens=1):
+        """Block the calling thread until the tokens are available; returns seconds waited"""
+        wait_time = self.reserve(tokens)
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return wait_time
+
+    async def acquire_async(self, tokens=1):
+        """Asyncio variant of acquire() that yields to the event loop while waiting"""
+        wait_time = self.reserve(tokens)
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+        return wait_time
+
+    def current_rate(self):
+        return self.rate
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+    def pause(self, seconds):
+        """Make the next reservation wait at least `seconds` (e.g. a provider retry-after)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 1 - seconds * self.rate)
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """Token bucket whose rate follows the provider's rate-limit headers.
+
+    With `x-ratelimit-remaining`/`reset` the remaining quota is spread evenly over the
+    reset window; `retry-after` pauses the bucket; a 429 without headers halves the rate
+    and plain successes nudge it back up (AIMD), always within [min_rate, max_rate].
+    """
+
+    def __init__(self, rate, capacity, name='default', min_rate=None, max_rate=None, increase_step=None):
+        super().__init__(rate, capacity, name=name)
+        self.min_rate = min_rate if min_rate is not None else 1.0 / RATE_LIMIT_MAX_DELAY
+        self.max_rate = max_rate if max_rate is not None else 1.0 / RATE_LIMIT_MIN_DELAY
+        self.increase_step = increase_step if increase_step is not None else self.min_rate
+
+    def _clamp(self, rate):
+        return max(self.min_rate, min(self.max_rate, rate))
+
+    def observe(self, headers):
+        """Adjust pacing from a successful response's headers"""
+        limits = parse_rate_limit_headers(headers)
+        if limits['retry_after'] is not None:
+            self.pause(limits['retry_after'])
+        remaining, reset = limits['remaining'], limits['reset']
+        if remaining is not None and reset is not None:
+            if remaining <= 0:
+                self.pause(reset)
+            else:
+                self.set_rate(self._clamp(remaining / max(reset, 1e-3)))
+        elif limits['retry_after'] is None:
+            self.set_rate(self._clamp(self.current_rate() + self.increase_step))
+        logger.debug(f"Rate limiter {self.name}: {self.current_rate() * 60:.1f} req/min")
+
+    def throttled(self, headers=None):
+        """Back off after a 429 / rate-limit error"""
+        limits = parse_rate_limit_headers(headers)
+        rate = self._clamp(self.current_rate() / 2)
+        self.set_rate(rate)
+        retry_after = limits['retry_after']
+        if retry_after is None and limits['remaining'] == 0:
+            retry_after = limits['reset']
+        self.pause(retry_after if retry_after is not None else 1.0 / rate)
+        logger.warning(f"Rate limiter {self.name}: throttled, now {rate * 60:.1f} req/min")
+
+
+class SharedTokenBucket(AdaptiveTokenBucket):
+    """Adaptive token bucket whose state lives in a SQLite (WAL) database.
+
+    Every process on the host that points at the same database file draws from one
+    budget. Each operation is a short `BEGIN IMMEDIATE` transaction, so reservations
+    from concurrent processes are serialised by SQLite's write lock.
+    """
+
+    def __init__(self, rate, capacity, name='default', db_path=RATE_LIMIT_DB, **kwargs):
+        super().__init__(rate, capacity, name=name, **kwargs)
+        self.db_path = db_path
+        self._local = threading.local()
+        # The configured rate and burst win over whatever an earlier configuration left in the
+        # database; the current token balance is kept (capped at the new capacity)
+        with self._transaction() as conn:
+            conn.execute(
+                'INSERT INTO rate_limits (name, tokens, updated, rate, capacity) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET rate = excluded.rate, capacity = excluded.capacity, '
+                'tokens = MIN(tokens, excluded.capacity)',
+                (name, float(capacity), time.time(), float(rate), float(capacity))
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limits ('
+                'name TEXT PRIMARY KEY, tokens REAL, updated REAL, rate REAL, capacity REAL)'
+            )
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        bucket = self
+
+        class _Transaction:
+            def __enter__(self):
+                self.conn = bucket._connect()
+                self.conn.execute('BEGIN IMMEDIATE')
+                return self.conn
+
+            def __exit__(self, exc_type, exc, tb):
+                self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+                return False
+
+        return _Transaction()
+
+    def _load(self, conn):
+        tokens, updated, rate, capacity = conn.execute(
+            'SELECT tokens, updated, rate, capacity FROM rate_limits WHERE name = ?', (self.name,)
+        ).fetchone()
+        now = time.time()
+        elapsed = now - updated
+        if elapsed > 0:
+            tokens = min(capacity, tokens + elapsed * rate)
+        return tokens, now, rate
+
+    def _store(self, conn, tokens, now, rate=None):
+        if rate is None:
+            conn.execute('UPDATE rate_limits SET tokens = ?, updated = ? WHERE name = ?', (tokens, now, self.name))
+        else:
+            conn.execute('UPDATE rate_limits SET tokens = ?, updated = ?, rate = ? WHERE name = ?', (tokens, now, rate, self.name))
+
+    def current_rate(self):
+        return self._connect().execute('SELECT rate FROM rate_limits WHERE name = ?', (self.name,)).fetchone()[0]
+
+    def reserve(self, tokens=1):
+        with self._transaction() as conn:
+            available, now, rate = self._load(conn)
+            available -= tokens
+            self._store(conn, available, now)
+        return 0.0 if available >= 0 else -available / rate
+
+    def set_rate(self, rate):
+        with self._transaction() as conn:
+            available, now, _ = self._load(conn)
+            self._store(conn, available, now, rate=float(rate))
+
+    def pause(self, seconds):
+        with self._transaction() as conn:
+            available, now, rate = self._load(conn)
+            self._store(conn, min(available, 1 - seconds * rate), now)
+
+
+class RateLimiterRegistry:
+    """Per-provider token buckets, created lazily with the default rate and burst"""
+
+    def __init__(self, default_rate=1.0 / RATE_LIMIT_DELAY, default_capacity=RATE_LIMIT_BURST,
+                 backend=RATE_LIMIT_BACKEND, db_path=RATE_LIMIT_DB):
+        if backend not in ('memory', 'sqlite'):
+            raise ValueError(f"Unknown rate limit backend: {backend}")
+        self.default_rate = default_rate
+        self.default_capacity = default_capacity
+        self.backend = backend
+        self.db_path = db_path
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, provider):
+        with self._lock:
+            bucket = self._buckets.get(provider)
+            if bucket is None:
+                if self.backend == 'sqlite':
+                    bucket = SharedTokenBucket(self.default_rate, self.default_capacity, name=provider,
+                                               db_path=self.db_path)
+                else:
+                    bucket = AdaptiveTokenBucket(self.default_rate, self.default_capacity, name=provider)
+                self._buckets[provider] = bucket
+            return bucket
+
+
+def provider_from_model(model):
+    """Extract the LiteLLM provider prefix from a model string (e.g. 'perplexity/sonar-pro')"""
+    if model and '/' in model:
+        return model.split('/', 1)[0]
+    return model or 'default'
+
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+def _parse_seconds(value):
+    """Parse '12', '1.5', '6m0s', '20ms' or an epoch timestamp into seconds from now"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        number = float(value)
+    except ValueError:
+        parts = _DURATION_PART.findall(value)
+        if not parts:
+            try:
+                from email.utils import parsedate_to_datetime
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                return None
+        return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+    if number > 1e9:  # absolute epoch seconds
+        return max(0.0, number - time.time())
+    return max(0.0, number)
+
+
+def parse_rate_limit_headers(headers):
+    """Normalise retry-after / x-ratelimit-* headers (optionally 'llm_provider-' prefixed)"""
+    normalised = {}
+    for key, value in dict(headers or {}).items():
+        key = str(key).lower()
+        if key.startswith('llm_provider-'):
+            key = key[len('llm_provider-'):]
+        normalised.setdefault(key, value)
+
+    def first(*names):
+        for name in names:
+            if normalised.get(name) is not None:
+                return normalised[name]
+        return None
+
+    remaining = first('x-ratelimit-remaining-requests', 'x-ratelimit-remaining')
+    try:
+        remaining = int(float(remaining)) if remaining is not None else None
+    except ValueError:
+        remaining = None
+    retry_after = _parse_seconds(first('retry-after'))
+    if retry_after is None and first('retry-after-ms') is not None:
+        retry_after_ms = _parse_seconds(first('retry-after-ms'))
+        retry_after = retry_after_ms / 1000 if retry_after_ms is not None else None
+    return {
+        'retry_after': retry_after,
+        'remaining': remaining,
+        'reset': _parse_seconds(first('x-ratelimit-reset-requests', 'x-ratelimit-reset')),
+    }
+
+
+def headers_from_response(response):
+    """Rate-limit headers LiteLLM attached to a completion response"""
+    hidden = getattr(response, '_hidden_params', None) or {}
+    headers = dict(hidden.get('additional_headers') or {})
+    headers.update(getattr(response, '_response_headers', None) or {})
+    return headers
+
+
+def headers_from_error(error):
+    headers = getattr(error, 'litellm_response_headers', None)
+    if headers is None:
+        headers = getattr(getattr(error, 'response', None), 'headers', None)
+    return dict(headers or {})
+
+
+def is_rate_limit_error(error):
+    status = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    return status == 429 or type(error).__name__ == 'RateLimitError'
+
+
+def on_llm_response(call, response):
+    """llm_hooks post-call hook: adapt the provider bucket to the returned headers"""
+    bucket = rate_limiters.bucket(call.provider)
+    if isinstance(bucket, AdaptiveTokenBucket):
+        bucket.observe(headers_from_response(response))
+
+
+def on_llm_error(call, error):
+    """llm_hooks error hook: back off when the provider throttles us"""
+    bucket = rate_limiters.bucket(call.provider)
+    if isinstance(bucket, AdaptiveTokenBucket) and is_rate_limit_error(error):
+        bucket.throttled(headers_from_error(error))
+
+
+# Shared registry used by the LiteLLM hooks
+rate_limiters = RateLimiterRegistry()
@@ -0,0 +1,182 @@
+import re
+import html
+
+from telegram_html import escape
+
+# Sections the summary task is asked to produce, with the emoji used for their headers
+REPORT_SECTIONS = {
+    'MARKET OVERVIEW': '📈',
+    'KEY MOVERS & CATALYSTS': '📊',
+    'MARKET IMPLICATIONS': '💡',
+}
+# Spellings the analyst model uses for each section
+_SECTION_NAMES = {
+    'MARKET OVERVIEW': r'market\s+overview',
+    'KEY MOVERS & CATALYSTS': r'key\s+movers(?:\s*(?:&|&amp;|and)\s*catalysts)?',
+    'MARKET IMPLICATIONS': r'(?:market\s+)?implications',
+}
+
+# Section header line: decoration (#, **, emoji, numbering) around a known section name, an
+# optional "(120 words)" note and either nothing else or a separator followed by content
+_SECTION = re.compile(
+    r'^[^\w\n]*(?:\d+[.)][ \t]*)?[^\w\n]*(?:'
+    + '|'.join(f'(?P<s{index}>{pattern})' for index, pattern in enumerate(_SECTION_NAMES.values())) + r')'
+    r'[ \t]*(?:\([^)\n]*\))?[ \t]*(?:\*\*|__)?[ \t]*(?P<separator>[:\-–—]?)[ \t]*(?:\*\*|__)?[ \t]*(?P<rest>.*)$',
+    re.IGNORECASE
+)
+_HEADING = re.compile(r'^[ \t]*#{1,6}[ \t]+(.+?)[ \t#]*$')
+_BULLET = re.compile(r'^[ \t]*[-*•][ \t]+')
+_CITATION = re.compile(r'[ \t]*\[\d+(?:[,\s]+\d+)*\]')
+
+# Markup coming from the model: a few HTML tags are mapped onto their Markdown equivalents,
+# other common HTML tags are dropped before the text is escaped
+_HTML_BOLD = re.compile(r'</?(?:b|strong)>', re.IGNORECASE)
+_HTML_ITALIC = re.compile(r'</?(?:i|em)>', re.IGNORECASE)
+_HTML_BREAK = re.compile(r'<(?:br|/p|/div|/li|/h[1-6])\s*/?>', re.IGNORECASE)
+_HTML_TAG = re.compile(
+    r'</?(?:p|div|span|font|ul|ol|li|h[1-6]|u|s|a|code|pre|blockquote|table|thead|tbody|tr|td|th)\b[^<>]*>',
+    re.IGNORECASE
+)
+
+_CODE = re.compile(r'`([^`\n]+)`')
+_LINK = re.compile(r'\[([^\]\n]+)\]\((https?://[^)\s]+)\)')
+_BOLD = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*|__(?=\S)(.+?)(?<=\S)__')
+_ITALIC = re.compile(r'(?<![\w*])\*(?=\S)([^*\n]+?)(?<=\S)\*(?![\w*])|(?<![\w_])_(?=\S)([^_\n]+?)(?<=\S)_(?![\w_])')
+_PLACEHOLDER = re.compile('\x00(\\d+)\x00')
+_TAG_SPLIT = re.compile(r'(<[^<>]+>)')
+
+# Figures worth emphasising: signed percentages and point/basis-point moves, currency amounts,
+# amounts with a magnitude suffix and grouped or decimal index levels (plain years are left alone)
+_METRIC = re.compile(
+    r'(?<![\w.,])(?:'
+    r'[+\-−]?(?:[$€£]|US\$)?\d[\d,]*(?:\.\d+)?[ \t]?(?:%|percent\b|bps\b|basis points\b|pts\b|points\b)'
+    r'|[+\-−]?(?:[$€£]|US\$)\d[\d,]*(?:\.\d+)?(?:[ \t]?(?:[KMBT]\b|thousand\b|million\b|billion\b|trillion\b))?'
+    r'|[+\-−]?\d[\d,]*(?:\.\d+)?[ \t]?(?:million|billion|trillion)\b'
+    r'|[+\-−]\d[\d,]*(?:\.\d+)?'
+    r'|\d{1,3}(?:,\d{3})+(?:\.\d+)?'
+    r'|\d+\.\d+'
+    r')(?![\w%])'
+)
+
+
+def _section_header(line):
+    """Return (canonical section name, trailing content) if the line opens a known section"""
+    match = _SECTION.match(line)
+    if not match:
+        return None
+    rest = match.group('rest').strip()
+    if rest and not match.group('separator'):
+        return None  # a sentence that starts with the words "Market overview", not a header
+    for index, name in enumerate(_SECTION_NAMES):
+        if match.group(f's{index}'):
+            return name, rest
+    return None
+
+
+def _emphasise_metrics(markup):
+    """Wrap figures in <i>, leaving text that is already italic, code or a link alone"""
+    parts, depth = [], 0
+    for piece in _TAG_SPLIT.split(markup):
+        if piece.startswith('<'):
+            name = piece.strip('</>').split()[0].lower()
+            if name in ('i', 'code', 'a'):
+                depth += -1 if piece.startswith('</') else 1
+            parts.append(piece)
+        elif depth:
+            parts.append(piece)
+        else:
+            parts.append(_METRIC.sub(lambda m: f'<i>{m.group(0)}</i>', piece))
+    return ''.join(parts)
+
+
+def _link(match):
+    """<a> for a Markdown link; escape() leaves quotes alone, but one would end the href"""
+    url = match.group(2).replace('"', '&quot;')
+    return f'<a href="{url}">{match.group(1)}</a>'
+
+
+def _nest_tags(markup):
+    """Make independently converted markup properly nested: a tag closed while tags opened
+    inside it are still open closes those first and reopens them after it (so
+    "<b>a <i>b</b> c</i>" becomes "<b>a <i>b</i></b><i> c</i>"); stray closing tags are
+    dropped and tags left open are closed at the end"""
+    parts, stack = [], []
+    for piece in _TAG_SPLIT.split(markup):
+        if not piece.startswith('<'):
+            parts.append(piece)
+            continue
+        name = piece.strip('</>').split()[0].lower()
+        if not piece.startswith('</'):
+            stack.append((name, piece))
+            parts.append(piece)
+            continue
+        names = [open_name for open_name, _ in stack]
+        if name not in names:
+            continue
+        index = len(names) - 1 - names[::-1].index(name)
+        inner = stack[index + 1:]
+        parts.append(''.join(f'</{inner_name}>' for inner_name, _ in reversed(inner)) + piece
+                     + ''.join(opening for _, opening in inner))
+        del stack[index]
+    parts.extend(f'</{name}>' for name, _ in reversed(stack))
+    return ''.join(parts)
+
+
+def _format_inline(text):
+    """Escape one line of Markdown/plain text and convert its inline markup to Telegram HTML"""
+    protected = []
+
+    def protect(markup):
+        protected.append(markup)
+        return f'\x00{len(protected) - 1}\x00'
+
+    text = escape(text)
+    text = _CODE.sub(lambda m: protect(f'<code>{m.group(1)}</code>'), text)
+    text = _LINK.sub(lambda m: protect(_link(m)), text)
+    text = _CITATION.sub('', text)
+    text = _BOLD.sub(lambda m: f'<b>{m.group(1) or m.group(2)}</b>', text)
+    text = _ITALIC.sub(lambda m: f'<i>{m.group(1) or m.group(2)}</i>', text)
+    text = _emphasise_metrics(_nest_tags(text))
+    return _PLACEHOLDER.sub(lambda m: protected[int(m.group(1))], text)
+
+
+def format_report(text):
+    """Turn the analyst's Markdown / plain-text report into Telegram HTML.
+
+    Known sections get a bold emoji header, other Markdown headings are bolded, bullets
+    become "•", **bold**, *italic*, `code` and links are converted, citation markers like
+    [1] are dropped and figures (percentages, prices, index levels) are italicised.
+    Entities in the input are decoded, tags are emitted properly nested (overlapping bold
+    and italic spans are split) and all other text is escaped, so the result is valid for
+    Telegram's HTML parse mode on its own, before chunk_html() splits it.
+    """
+    if not text:
+        return ''
+    text = _HTML_BREAK.sub('\n', text.replace('\r\n', '\n'))
+    text = _HTML_BOLD.sub('**', text)
+    text = _HTML_ITALIC.sub('*', text)
+    text = _HTML_TAG.sub('', text)
+    text = html.unescape(text)  # models sometimes emit entities; everything is re-escaped below
+
+    lines = []
+    for line in text.split('\n'):
+        section = _section_header(line)
+        if section:
+            name, rest = section
+            if lines and lines[-1]:
+                lines.append('')
+            lines.append(f'<b>{REPORT_SECTIONS[name]} {escape(name)}</b>')
+            if rest:
+                lines.append(_format_inline(rest))
+            continue
+        heading = _HEADING.match(line)
+        if heading:
+            if lines and lines[-1]:
+                lines.append('')
+            lines.append(f'<b>{_format_inline(heading.group(1).strip("*_ "))}</b>')
+            continue
+        if _BULLET.match(line):
+            line = '• ' + _BULLET.sub('', line, count=1)
+        lines.append(_format_inline(line.rstrip()))
+
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
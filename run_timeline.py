@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import logging
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from usage_tracker import response_usage
+
+logger = logging.getLogger(__name__)
+
+TIMING_DIR = os.getenv('TIMING_DIR', os.path.join('state', 'timings'))
+
+# Span categories; a stage's time not covered by LLM calls, rate-limit waits or Telegram I/O is overhead
+CATEGORIES = ('llm', 'rate_limit', 'telegram')
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """One timed operation of a run; times are wall-clock epoch seconds"""
+
+    def __init__(self, name, category, start, end=None, parent_id=None, **attributes):
+        self.span_id = next(_span_ids)
+        self.name = name
+        self.category = category
+        self.start = start
+        self.end = end
+        self.parent_id = parent_id
+        self.attributes = attributes
+
+    @property
+    def duration(self):
+        return (self.end if self.end is not None else time.time()) - self.start
+
+    @property
+    def stage(self):
+        return self.attributes.get('stage')
+
+    def as_dict(self):
+        return {
+            'id': self.span_id, 'parent_id': self.parent_id, 'name': self.name, 'category': self.category,
+            'start': round(self.start, 6), 'end': round(self.end, 6) if self.end is not None else None,
+            'duration': round(self.duration, 6), 'attributes': self.attributes,
+        }
+
+
+class RunTimeline:
+    """Spans of one run: the run itself, each task, each LLM call, each rate-limit sleep and
+    each Telegram request.
+
+    span() times a block and nests under the span open in the same context; record() adds
+    an operation measured elsewhere (LLM hooks, the dispatcher) and hangs it under the
+    current span or, from other threads, under the run's root span. Spans carry a `stage`
+    attribute (`search`, `summary`, `translation:<language>`, `publish:<language>`), which
+    breakdown() uses to split each stage's wall time into LLM latency, rate-limit waiting,
+    Telegram I/O and the remaining framework overhead.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.root = None
+        self.first_message = None   # time to first message, set by record_first_message()
+        self._listeners = []
+        self._sequence_mark = None
+        self._lock = threading.Lock()
+
+    def add_listener(self, fn):
+        """Call fn(span) for every span as soon as it has finished (e.g. to update metrics)"""
+        self._listeners.append(fn)
+
+    def _add(self, span):
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def _finished(self, span):
+        for listener in self._listeners:
+            try:
+                listener(span)
+            except Exception as e:
+                logger.warning(f"Timeline listener failed: {e}")
+        return span
+
+    def _parent_id(self):
+        parent = _current_span.get() or self.root
+        return parent.span_id if parent else None
+
+    @contextmanager
+    def span(self, name, category, **attributes):
+        span = self._add(Span(name, category, time.time(), parent_id=self._parent_id(), **attributes))
+        if self.root is None:
+            self.root = span
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attributes['error'] = f'{type(e).__name__}: {str(e)[:200]}'
+            raise
+        finally:
+            span.end = time.time()
+            _current_span.reset(token)
+            self._finished(span)
+
+    def record(self, name, category, start, end, **attributes):
+        """Add an already finished operation"""
+        return self._finished(self._add(Span(name, category, start, end, parent_id=self._parent_id(), **attributes)))
+
+    def start_sequence(self):
+        """Mark the start of a sequential run of tasks timed by task_callback()"""
+        self._sequence_mark = time.time()
+
+    def task_callback(self, stage, callback=None):
+        """CrewAI Task callback that records the task as a span from the end of the previous
+        task of the sequence (or start_sequence()) until now, then calls `callback`"""
+        def timed_task(output):
+            now = time.time()
+            start = self._sequence_mark or now
+            self._sequence_mark = now
+            self.record(stage, 'task', start, now, stage=stage)
+            if callback is not None:
+                callback(output)
+        return timed_task
+
+    def record_first_message(self, overall, by_language):
+        """Store the time to first message (seconds from the start of the run to the first accepted
+        Telegram message), overall and per language; it is also set on the root span"""
+        self.first_message = {
+            'overall': round(overall, 3),
+            'languages': {language: round(seconds, 3) for language, seconds in by_language.items()},
+        }
+        if self.root is not None:
+            self.root.attributes['time_to_first_message'] = self.first_message['overall']
+
+    def breakdown(self):
+        """Per stage: wall seconds of its task span and busy seconds per category, plus overhead"""
+        with self._lock:
+            spans = [span for span in self.spans if span.end is not None]
+        stages = {}
+        for span in spans:
+            if span.stage is None or span.category not in CATEGORIES + ('task', 'publish'):
+                continue
+            stage = stages.setdefault(span.stage, dict({'wall': 0.0}, **{category: 0.0 for category in CATEGORIES}))
+            if span.category in ('task', 'publish'):
+                stage['wall'] += span.duration
+            else:
+                stage[span.category] += span.duration
+        for stage in stages.values():
+            stage['overhead'] = max(0.0, stage['wall'] - sum(stage[category] for category in CATEGORIES))
+            for name, value in stage.items():
+                stage[name] = round(value, 3)
+        return stages
+
+    def totals(self):
+        """Busy seconds per category over the whole run (concurrent spans add up)"""
+        totals = {category: 0.0 for category in CATEGORIES}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            if span.category in totals and span.end is not None:
+                totals[span.category] += span.duration
+        return {category: round(seconds, 3) for category, seconds in totals.items()}
+
+    def as_dict(self, run_id=None):
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            'run_id': run_id,
+            'started': self.root.start if self.root else None,
+            'wall_seconds': round(self.root.duration, 3) if self.root else None,
+            'totals': self.totals(),
+            'stages': self.breakdown(),
+            'time_to_first_message': self.first_message,
+            'spans': [span.as_dict() for span in spans],
+        }
+
+    def write(self, run_id, directory=TIMING_DIR):
+        """Write the run's breakdown and spans to <directory>/<run_id>.json; returns the path"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{run_id}.json')
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(self.as_dict(run_id), handle, ensure_ascii=False, indent=2, default=str)
+        return path
+
+    def summary(self):
+        stages = self.breakdown()
+        lines = [f"Run timeline: {self.root.duration:.1f}s wall clock" if self.root else 'Run timeline']
+        if self.first_message:
+            lines[0] += f", first message after {self.first_message['overall']:.1f}s"
+        for stage, seconds in stages.items():
+            lines.append(f"   {stage}: {seconds['wall']:.1f}s = LLM {seconds['llm']:.1f}s + rate-limit wait "
+                         f"{seconds['rate_limit']:.1f}s + Telegram {seconds['telegram']:.1f}s + "
+                         f"overhead {seconds['overhead']:.1f}s")
+        return '\n'.join(lines)
+
+
+# Timeline of the current process's run
+timeline = RunTimeline()
+
+
+def record_llm_call(call, response):
+    """llm_hooks completion hook: one span per LLM call (zero length for cache hits)"""
+    end = time.time()
+    start = call.started if call.started is not None else end
+    if call.elapsed is not None:
+        end = start + call.elapsed
+    prompt_tokens, completion_tokens = response_usage(response)
+    timeline.record(f'llm {call.model}', 'llm', start, end, stage=call.metadata.get('stage'), model=call.model,
+                    stream=call.stream, cache_hit=call.cache_hit, prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens)
+
+
+def record_llm_error(call, error):
+    """llm_hooks error hook: failed calls are timed too"""
+    start = call.started if call.started is not None else time.time()
+    timeline.record(f'llm {call.model}', 'llm', start, start + (call.elapsed or 0.0),
+                    stage=call.metadata.get('stage'), model=call.model, error=f'{type(error).__name__}: {str(error)[:200]}')
@@ -0,0 +1,128 @@
+import os
+import re
+import time
+import logging
+import threading
+
+from telegram_dispatcher import OutgoingMessage
+from telegram_html import chunk_html, TELEGRAM_MAX_LENGTH
+from report_formatter import format_report
+
+logger = logging.getLogger(__name__)
+
+# Stream the analysis into a live Telegram message instead of posting it only once it is complete.
+# Opt-in: readers see the model's unreviewed partial output
+STREAM_SUMMARY = os.getenv('STREAM_SUMMARY', 'false').lower() == 'true'
+# Coalescing window: at most one round of edits per this many seconds (Telegram allows ~1 message/s per chat)
+STREAM_EDIT_INTERVAL = float(os.getenv('STREAM_EDIT_INTERVAL', '2'))
+# Characters of the answer that must have arrived before the preview message is posted
+STREAM_MIN_CHARS = int(os.getenv('STREAM_MIN_CHARS', '80'))
+
+_FINAL_ANSWER = re.compile(r'Final Answer:[ \t]*\n?', re.IGNORECASE)
+_CURSOR = ' ▌'
+
+
+def visible_answer(text):
+    """The part of a streamed agent reply readers should see: what follows 'Final Answer:' once
+    it appears, and nothing while the model is still writing its 'Thought:' preamble"""
+    matches = list(_FINAL_ANSWER.finditer(text))
+    if matches:
+        return text[matches[-1].end():]
+    head = text.lstrip()[:len('Thought:')]
+    return '' if 'Thought:'.startswith(head) else text
+
+
+class StreamingPreview:
+    """A Telegram message per target that shows a streamed LLM reply while it is being written.
+
+    on_chunk() is an llm_hooks stream hook and only accumulates text. A worker thread posts the
+    message once min_chars have arrived and then edits it with editMessageText, at most one
+    round per `interval` seconds and only if new text came in, so a fast stream costs one edit
+    per window rather than one per token. Rounds go through the dispatcher's token buckets, so
+    with many targets a round simply takes longer and the next one carries all the text
+    accumulated meanwhile. After close(), message_ids lets the final report replace the preview.
+    """
+
+    def __init__(self, dispatcher, targets, language='English', interval=STREAM_EDIT_INTERVAL,
+                 min_chars=STREAM_MIN_CHARS):
+        self.dispatcher = dispatcher
+        self.targets = targets
+        self.language = language
+        self.interval = interval
+        self.min_chars = min_chars
+        self.message_ids = {}      # (chat_id, thread_id) -> message_id of the preview
+        self.rounds = 0
+        self.started = None        # first streamed chunk
+        self.first_shown_at = None
+        self._text = ''
+        self._call = None
+        self._version = 0
+        self._shown = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def on_chunk(self, call, text):
+        with self._lock:
+            if call is not self._call:
+                # A new request (the agent's next step or a retry) replaces what was streamed so far
+                self._call = call
+                self._text = ''
+            self._text += text
+            self._version += 1
+            if self._thread is None:
+                self.started = time.time()
+                self._thread = threading.Thread(target=self._run, name='streaming-preview', daemon=True)
+                self._thread.start()
+
+    def render(self, text):
+        """Telegram HTML for the preview: header, the formatted text so far and a cursor"""
+        header = f'<b>🔹 {self.language} Financial Analysis</b>\n✍️ <i>Writing live...</i>\n\n'
+        chunks = chunk_html(format_report(text), TELEGRAM_MAX_LENGTH - len(header) - 40)
+        return header + chunks[0] + ('\n…' if len(chunks) > 1 else _CURSOR)
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                version, text = self._version, visible_answer(self._text).strip()
+            if version != self._shown and len(text) >= (1 if self.message_ids else self.min_chars):
+                try:
+                    self._publish(self.render(text))
+                except Exception as e:
+                    logger.warning(f"Streaming preview update failed: {e}")
+                self._shown = version
+            self._stop.wait(self.interval)
+
+    def _publish(self, text):
+        messages = [
+            OutgoingMessage(target.chat_id, text, language=self.language, thread_id=target.thread_id,
+                            message_id=self.message_ids.get((target.chat_id, target.thread_id)), stage='preview')
+            for target in self.targets
+        ]
+        report = self.dispatcher.dispatch_sync(messages)
+        for result in report.sent:
+            if result.message_id:
+                self.message_ids[(result.message.chat_id, result.message.thread_id)] = result.message_id
+        if self.first_shown_at is None and report.first_sent_at is not None:
+            self.first_shown_at = report.first_sent_at
+        self.rounds += 1
+
+    def close(self):
+        """Stop updating; the previews keep their last text until the final report replaces them"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def abandon(self, notice):
+        """Stop updating and replace the half-written previews with a short notice, for when the
+        report that should replace them is never produced"""
+        self.close()
+        if self.message_ids:
+            self._publish(f'<b>🔹 {self.language} Financial Analysis</b>\n{notice}')
+
+    def summary(self, since=None):
+        if self.first_shown_at is None:
+            return None
+        shown = f'{self.first_shown_at - since:.1f}s into the run' if since else 'live'
+        return (f'Streaming preview: first text {shown}, {self.rounds} updates to '
+                f'{len(self.message_ids)} chat(s)')
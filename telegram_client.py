@@ -0,0 +1,169 @@
+import time
+import logging
+import threading
+from collections import deque
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+TELEGRAM_API_BASE = 'https://api.telegram.org'
+
+
+class RequestTiming:
+    """Per-request network timing collected from httpx trace events (all values in ms)"""
+
+    def __init__(self, method):
+        self.method = method
+        self.started = time.perf_counter()
+        self.connect_ms = 0.0
+        self.tls_ms = 0.0
+        self.ttfb_ms = None
+        self.total_ms = None
+        self.http_version = None
+        self.status_code = None
+        self.reused_connection = True
+        self._marks = {}
+
+    def trace(self, event_name, info):
+        now = time.perf_counter()
+        if event_name.endswith('.started'):
+            self._marks[event_name[:-len('.started')]] = now
+            return
+        if not event_name.endswith('.complete'):
+            return
+        step = event_name[:-len('.complete')]
+        elapsed_ms = (now - self._marks.get(step, now)) * 1000
+        if step == 'connection.connect_tcp':
+            self.connect_ms = elapsed_ms
+            self.reused_connection = False
+        elif step == 'connection.start_tls':
+            self.tls_ms = elapsed_ms
+        elif step.endswith('.receive_response_headers'):
+            self.ttfb_ms = (now - self.started) * 1000
+
+    async def atrace(self, event_name, info):
+        # httpx's async transport requires a coroutine trace callback
+        self.trace(event_name, info)
+
+    def finish(self, response):
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+        if response is not None:
+            self.status_code = response.status_code
+            self.http_version = response.http_version
+
+    def as_dict(self):
+        return {
+            'method': self.method,
+            'status_code': self.status_code,
+            'http_version': self.http_version,
+            'reused_connection': self.reused_connection,
+            'connect_ms': round(self.connect_ms, 1),
+            'tls_ms': round(self.tls_ms, 1),
+            'ttfb_ms': round(self.ttfb_ms, 1) if self.ttfb_ms is not None else None,
+            'total_ms': round(self.total_ms, 1) if self.total_ms is not None else None,
+        }
+
+
+class TelegramClient:
+    """Bot API client backed by one pooled keep-alive httpx connection pool (HTTP/2 when available)"""
+
+    def __init__(self, token, base_url=TELEGRAM_API_BASE, http2=True, timeout=30.0, max_connections=10):
+        self.token = token
+        self.base_url = base_url.rstrip('/')
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.timings = deque(maxlen=200)
+        self._client = None
+        self._async_client = None
+        self._lock = threading.Lock()
+
+    def _client_options(self):
+        return {
+            'http2': self.http2,
+            'timeout': self.timeout,
+            'limits': httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=120
+            )
+        }
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(**self._client_options())
+        return self._client
+
+    @property
+    def async_client(self):
+        """Pooled AsyncClient; it is bound to the event loop that first uses it"""
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    self._async_client = httpx.AsyncClient(**self._client_options())
+        return self._async_client
+
+    def method_url(self, method):
+        return f'{self.base_url}/bot{self.token}/{method}'
+
+    def post(self, method, payload):
+        """POST a Bot API method; returns (response, RequestTiming)"""
+        timing = RequestTiming(method)
+        response = None
+        try:
+            response = self.client.post(self.method_url(method), json=payload, extensions={'trace': timing.trace})
+            return response, timing
+        finally:
+            timing.finish(response)
+            self.timings.append(timing)
+            logger.debug(f"Telegram {method}: {timing.as_dict()}")
+
+    async def apost(self, method, payload):
+        """Async variant of post() on the pooled AsyncClient"""
+        timing = RequestTiming(method)
+        response = None
+        try:
+            response = await self.async_client.post(self.method_url(method), json=payload, extensions={'trace': timing.atrace})
+            return response, timing
+        finally:
+            timing.finish(response)
+            self.timings.append(timing)
+            logger.debug(f"Telegram {method}: {timing.as_dict()}")
+
+    def timing_summary(self):
+        """Average connect/TLS/TTFB over recent requests, split into new vs reused connections"""
+        summary = {}
+        for label, reused in (('new_connection', False), ('reused_connection', True)):
+            timings = [t for t in self.timings if t.reused_connection == reused and t.total_ms is not None]
+            if not timings:
+                continue
+            ttfbs = [t.ttfb_ms for t in timings if t.ttfb_ms is not None]
+            summary[label] = {
+                'requests': len(timings),
+                'avg_connect_ms': round(sum(t.connect_ms for t in timings) / len(timings), 1),
+                'avg_tls_ms': round(sum(t.tls_ms for t in timings) / len(timings), 1),
+                'avg_ttfb_ms': round(sum(ttfbs) / len(ttfbs), 1) if ttfbs else None,
+                'avg_total_ms': round(sum(t.total_ms for t in timings) / len(timings), 1),
+            }
+        return summary
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
@@ -0,0 +1,237 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+
+from rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Telegram Bot API limits: ~30 messages/second overall and ~1 message/second per chat
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', '30'))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', '1'))
+TELEGRAM_CHAT_BURST = int(os.getenv('TELEGRAM_CHAT_BURST', '1'))
+# Attempts per message for 429 (honouring retry_after) and transient 5xx/network errors
+TELEGRAM_MAX_ATTEMPTS = int(os.getenv('TELEGRAM_MAX_ATTEMPTS', '5'))
+
+
+class OutgoingMessage:
+    """One sendMessage call queued for delivery, or an editMessageText call when message_id is
+    set (the text replaces a message already in the chat, e.g. a streamed preview)"""
+
+    def __init__(self, chat_id, text, language='English', parse_mode='HTML', disable_web_page_preview=False,
+                 chunk_index=0, chunk_count=1, run_id=None, thread_id=None, message_id=None, stage=None):
+        self.chat_id = chat_id
+        self.text = text
+        self.language = language
+        self.chunk_index = chunk_index
+        self.chunk_count = chunk_count
+        self.run_id = run_id
+        self.thread_id = thread_id
+        self.parse_mode = parse_mode
+        self.disable_web_page_preview = disable_web_page_preview
+        self.message_id = message_id
+        self.stage = stage or f'publish:{language}'  # run timeline stage the delivery is attributed to
+
+    @property
+    def method(self):
+        return 'editMessageText' if self.message_id else 'sendMessage'
+
+    def payload(self):
+        payload = {
+            'chat_id': self.chat_id,
+            'text': self.text,
+            'parse_mode': self.parse_mode,
+            'disable_web_page_preview': self.disable_web_page_preview
+        }
+        if self.message_id:
+            payload['message_id'] = self.message_id
+        elif self.thread_id:
+            payload['message_thread_id'] = self.thread_id
+        return payload
+
+    @property
+    def key(self):
+        """Idempotency key used by the outbound queue"""
+        return (self.run_id, str(self.chat_id), self.thread_id or 0, self.language, self.chunk_index)
+
+    @property
+    def label(self):
+        if self.chunk_count > 1:
+            return f'{self.language} ({self.chunk_index + 1}/{self.chunk_count})'
+        return self.language
+
+
+class DeliveryResult:
+    def __init__(self, message, ok, status_code=None, description=None, message_id=None, latency=None,
+                 retry_after=None, attempts=1):
+        self.message = message
+        self.ok = ok
+        self.status_code = status_code
+        self.description = description
+        self.message_id = message_id
+        self.latency = latency
+        self.retry_after = retry_after
+        self.attempts = attempts
+        self.completed_at = time.time()
+
+    @property
+    def retryable(self):
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
+
+    def __str__(self):
+        retries = f' after {self.attempts} attempts' if self.attempts > 1 else ''
+        if self.ok:
+            return f'✅ {self.message.label} sent successfully{retries}'
+        return f'❌ {self.message.label} failed{retries}: {self.description}'
+
+
+class DeliveryReport:
+    """Combined outcome of one dispatch() call"""
+
+    def __init__(self, results, started, finished):
+        self.results = results
+        self.started = started
+        self.finished = finished
+
+    @property
+    def sent(self):
+        return [r for r in self.results if r.ok]
+
+    @property
+    def failed(self):
+        return [r for r in self.results if not r.ok]
+
+    @property
+    def elapsed(self):
+        return self.finished - self.started
+
+    @property
+    def first_sent_at(self):
+        """Wall-clock time the first message of this dispatch was accepted, or None"""
+        return min((r.completed_at for r in self.results if r.ok), default=None)
+
+
+class TelegramDispatcher:
+    """Async Telegram sender paced by token buckets instead of fixed sleeps.
+
+    Messages for different chats go out concurrently; messages for the same chat (such
+    as the chunks of one long report) keep their order. A global bucket enforces the
+    bot-wide limit and one bucket per chat enforces the per-chat limit. The dispatcher
+    runs on its own event loop thread so the pooled AsyncClient (and its keep-alive
+    connections) outlives individual dispatches.
+    """
+
+    def __init__(self, client, global_rate=TELEGRAM_GLOBAL_RATE, chat_rate=TELEGRAM_CHAT_RATE,
+                 chat_burst=TELEGRAM_CHAT_BURST, max_attempts=TELEGRAM_MAX_ATTEMPTS, timeline=None):
+        self.client = client
+        self.timeline = timeline  # optional run_timeline.RunTimeline that gets a span per wait and request
+        self.max_attempts = max_attempts
+        self.global_bucket = TokenBucket(global_rate, max(1, int(global_rate)), name='telegram-global')
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self._chat_buckets = {}
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def chat_bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, self.chat_burst, name=f'telegram-chat-{chat_id}')
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def send_once(self, message):
+        """Wait for a slot in both buckets, then POST sendMessage (or editMessageText) once"""
+        waited = time.time()
+        await self.chat_bucket(message.chat_id).acquire_async()
+        await self.global_bucket.acquire_async()
+        started = time.time()
+        if self.timeline is not None and started - waited > 0.001:
+            self.timeline.record('telegram pacing', 'rate_limit', waited, started,
+                                 stage=message.stage, chat_id=str(message.chat_id))
+        try:
+            response, _ = await self.client.apost(message.method, message.payload())
+        except Exception as e:
+            self._record_request(message, started, None)
+            return DeliveryResult(message, False, description=str(e)[:100], latency=time.time() - started)
+        self._record_request(message, started, response.status_code)
+        try:
+            data = response.json() if response.content else {}
+        except ValueError:
+            data = {}
+        if response.status_code == 200:
+            message_id = (data.get('result') or {}).get('message_id')
+            return DeliveryResult(message, True, 200, message_id=message_id, latency=time.time() - started)
+        if message.message_id and 'message is not modified' in data.get('description', ''):
+            # The edit is a no-op: the chat already shows this text
+            return DeliveryResult(message, True, response.status_code, message_id=message.message_id,
+                                  latency=time.time() - started)
+        retry_after = (data.get('parameters') or {}).get('retry_after')
+        return DeliveryResult(message, False, response.status_code, data.get('description', 'Unknown error'),
+                              latency=time.time() - started, retry_after=retry_after)
+
+    def _record_request(self, message, started, status_code):
+        if self.timeline is not None:
+            self.timeline.record(f'telegram {message.method}', 'telegram', started, time.time(),
+                                 stage=message.stage, chat_id=str(message.chat_id),
+                                 chunk=message.chunk_index, status_code=status_code, characters=len(message.text))
+
+    async def send(self, message):
+        """Send one message, re-queueing it after 429s and transient failures.
+
+        A 429 pauses only this chat's bucket for exactly `parameters.retry_after`
+        seconds; other chats keep flowing because each chat has its own coroutine.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            result = await self.send_once(message)
+            result.attempts = attempt
+            if result.ok or not result.retryable or attempt == self.max_attempts:
+                return result
+            if result.status_code == 429:
+                delay = float(result.retry_after or 1)
+                logger.warning(f"Telegram 429 for chat {message.chat_id}: retrying {message.label} in {delay:.0f}s")
+                self.chat_bucket(message.chat_id).pause(delay)
+            else:
+                delay = min(30, 2 ** (attempt - 1))
+                logger.warning(f"Telegram send of {message.label} failed ({result.description}); retrying in {delay}s")
+                await asyncio.sleep(delay)
+        return result
+
+    async def _send_chat(self, messages):
+        return [await self.send(message) for message in messages]
+
+    async def dispatch(self, messages):
+        """Send all messages as fast as the limits allow; returns a DeliveryReport"""
+        started = time.time()
+        by_chat = {}
+        for message in messages:
+            by_chat.setdefault(message.chat_id, []).append(message)
+        per_chat = await asyncio.gather(*(self._send_chat(chat_messages) for chat_messages in by_chat.values()))
+        results = {id(r.message): r for chat_results in per_chat for r in chat_results}
+        return DeliveryReport([results[id(m)] for m in messages], started, time.time())
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name='telegram-dispatcher', daemon=True)
+                self._thread.start()
+        return self._loop
+
+    def submit(self, messages):
+        """Schedule dispatch() on the dispatcher loop from synchronous code; returns a Future"""
+        return asyncio.run_coroutine_threadsafe(self.dispatch(list(messages)), self._ensure_loop())
+
+    def dispatch_sync(self, messages, timeout=None):
+        return self.submit(messages).result(timeout)
+
+    def close(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.client.aclose(), self._loop).result(10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(10)
+        self._loop = None
@@ -0,0 +1,192 @@
+import re
+import html
+
+# Telegram's hard limit for sendMessage text
+TELEGRAM_MAX_LENGTH = 4096
+
+# Tags accepted by Telegram's HTML parse mode
+TELEGRAM_TAGS = {
+    'b', 'strong', 'i', 'em', 'u', 'ins', 's', 'strike', 'del', 'span',
+    'tg-spoiler', 'a', 'code', 'pre', 'blockquote', 'tg-emoji'
+}
+# Unsupported block tags that LLMs like to emit; they become line breaks
+_NEWLINE_TAGS = {'br', 'p', 'div', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'tr'}
+
+_TOKEN = re.compile(
+    r'<(/?)([a-zA-Z][a-zA-Z0-9-]*)((?:\s[^<>]*)?)/?>'   # tag
+    r'|&(?:#\d+|#x[0-9a-fA-F]+|lt|gt|amp|quot);'       # entity (the only named ones Telegram accepts)
+    r'|[^<&]+'                                        # plain text
+    r'|[<&]'                                          # stray markup character
+)
+_MARKUP = re.compile(r'<[^<>]*>')
+_TEXT_BREAK = re.compile(r'\n[ \t]*\n\s*|\n|(?<=[.!?:;])[ \t]+|[ \t]+')
+
+# Break priorities: higher is a better place to split a chunk
+_PARAGRAPH, _LINE, _SENTENCE, _WORD = 3, 2, 1, 0
+
+
+def _break_priority(separator):
+    if separator.count('\n') >= 2:
+        return _PARAGRAPH
+    if '\n' in separator:
+        return _LINE
+    return _WORD
+
+
+def tokenize(text):
+    """Split Telegram HTML into atoms: ('open', name, markup), ('close', name, markup),
+    ('text', None, escaped_text) and ('break', priority, whitespace).
+
+    Unsupported tags are dropped (block tags become newlines) and stray '<', '>' and '&'
+    are escaped, so every atom is valid Telegram HTML on its own.
+    """
+    atoms = []
+    for match in _TOKEN.finditer(text):
+        token = match.group(0)
+        name = match.group(2)
+        if name is not None:
+            name = name.lower()
+            closing = bool(match.group(1))
+            if name in TELEGRAM_TAGS:
+                atoms.append(('close' if closing else 'open', name, f'</{name}>' if closing else token))
+            elif name in _NEWLINE_TAGS:
+                atoms.append(('break', _LINE, '\n'))
+            continue
+        if token[0] == '&':
+            atoms.append(('text', None, token if len(token) > 1 else '&amp;'))
+            continue
+        if token == '<':
+            atoms.append(('text', None, '&lt;'))
+            continue
+        position = 0
+        for separator in _TEXT_BREAK.finditer(token):
+            if separator.start() > position:
+                atoms.append(('text', None, token[position:separator.start()].replace('>', '&gt;')))
+            priority = _break_priority(separator.group(0))
+            if priority == _WORD and separator.start() > 0 and token[separator.start() - 1] in '.!?:;':
+                priority = _SENTENCE
+            atoms.append(('break', priority, separator.group(0)))
+            position = separator.end()
+        if position < len(token):
+            atoms.append(('text', None, token[position:].replace('>', '&gt;')))
+    return atoms
+
+
+def _has_text(markup):
+    return bool(_MARKUP.sub('', markup).strip())
+
+
+def _closing_markup(stack):
+    return ''.join(f'</{name}>' for name, _ in reversed(stack))
+
+
+def _opening_markup(stack):
+    return ''.join(markup for _, markup in stack)
+
+
+def chunk_html(text, limit=TELEGRAM_MAX_LENGTH):
+    """Split Telegram HTML into chunks of at most `limit` characters.
+
+    Chunks end at the best available boundary (paragraph, then line, sentence, word)
+    in the second half of the chunk; tags still open at a split are closed at the end of
+    the chunk and reopened at the start of the next one, so every chunk is balanced.
+    Runs in a single pass over the tokenized text.
+    """
+    atoms = tokenize(text)
+    chunks = []
+    stack = []               # currently open tags as (name, opening markup)
+    parts = []               # markup of the chunk being built
+    length = 0
+    breaks = {}              # priority -> (index into parts, length, stack snapshot)
+    chunk_stack = ()         # tags reopened at the start of the current chunk
+
+    def flush(cut=None):
+        nonlocal parts, length, breaks, chunk_stack
+        if cut is None:
+            index, cut_length, end_stack = len(parts), length, list(stack)
+        else:
+            index, cut_length, end_stack = cut
+        body, rest = parts[:index], parts[index:]
+        content = ''.join(body).rstrip()
+        if _has_text(content):
+            chunks.append(content + _closing_markup(end_stack))
+        chunk_stack = tuple(end_stack)
+        prefix = _opening_markup(end_stack)
+        parts = ([prefix] if prefix else []) + rest
+        length = length - cut_length + len(prefix)
+        # Carry the tail over (it is shorter than a chunk, so this keeps the pass linear)
+        # together with the break points that fall inside it
+        offset = len(parts) - len(rest)
+        breaks = {
+            priority: (i - index + offset, at - cut_length + len(prefix), snapshot)
+            for priority, (i, at, snapshot) in breaks.items() if i > index
+        }
+
+    def room():
+        return limit - length - len(_closing_markup(stack))
+
+    for kind, value, markup in atoms:
+        if kind == 'break':
+            if not parts or length == len(_opening_markup(chunk_stack)):
+                continue  # never start a chunk with whitespace
+            if len(markup) > room():
+                flush()
+                continue
+            parts.append(markup)
+            length += len(markup)
+            breaks[value] = (len(parts), length, list(stack))
+            continue
+
+        extra = 0  # closing markup a new opening tag will need
+        if kind == 'close':
+            names = [name for name, _ in stack]
+            if value not in names:
+                continue  # unmatched closing tag
+            # Close intervening tags, then reopen them, so nesting stays valid
+            inner = stack[names.index(value) + 1:]
+            markup = _closing_markup(inner) + markup + _opening_markup(inner)
+        elif kind == 'open':
+            extra = len(f'</{value}>')
+
+        while len(markup) + extra > room():
+            best = None
+            for priority in (_PARAGRAPH, _LINE, _SENTENCE, _WORD):
+                cut = breaks.get(priority)
+                if cut is not None and cut[1] >= limit // 2:
+                    best = cut
+                    break
+            if best is None and breaks:
+                best = breaks[max(breaks)]
+            if best is not None:
+                flush(best)
+                continue
+            if kind == 'text' and _has_text(''.join(parts)):
+                flush()
+                continue
+            if kind != 'text' or room() <= 0:
+                flush()
+                break
+            # A single word longer than a chunk: hard split, without cutting an entity
+            cut_at = room()
+            ampersand = markup.rfind('&', max(0, cut_at - 10), cut_at)
+            if ampersand > 0 and ';' not in markup[ampersand:cut_at]:
+                cut_at = ampersand
+            parts.append(markup[:cut_at])
+            length += cut_at
+            markup = markup[cut_at:]
+            flush()
+        parts.append(markup)
+        length += len(markup)
+        if kind == 'open':
+            stack.append((value, markup))
+        elif kind == 'close':
+            index = [name for name, _ in stack].index(value)
+            stack[index:] = stack[index + 1:]
+
+    flush()
+    return chunks
+
+
+def escape(text):
+    """Escape plain text for Telegram's HTML parse mode"""
+    return html.escape(text, quote=False)
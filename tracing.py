@@ -0,0 +1,147 @@
+import os
+import json
+import random
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from opentelemetry import trace as otel_trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+# 'jsonl' (local file), 'otlp' (collector, needs opentelemetry-sdk + opentelemetry-exporter-otlp-proto-http) or 'none'
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'jsonl').lower()
+TRACE_FILE = os.getenv('TRACE_FILE', os.path.join('state', 'traces.jsonl'))
+# Standard OpenTelemetry variable; a local collector listens on 4318 for OTLP/HTTP
+OTLP_ENDPOINT = os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT', 'http://localhost:4318')
+SERVICE_NAME = os.getenv('OTEL_SERVICE_NAME', 'financial-bot')
+
+# Timeline attribute names -> OpenTelemetry semantic convention names
+_SEMANTIC_NAMES = {
+    'model': 'gen_ai.request.model',
+    'prompt_tokens': 'gen_ai.usage.input_tokens',
+    'completion_tokens': 'gen_ai.usage.output_tokens',
+    'status_code': 'http.response.status_code',
+    'chat_id': 'messaging.destination.name',
+}
+_SPAN_KINDS = {'llm': 'CLIENT', 'telegram': 'CLIENT'}
+
+
+def _nanos(seconds):
+    return int(seconds * 1e9)
+
+
+def span_attributes(span, run_id=None):
+    """A timeline span's attributes as OpenTelemetry attributes (primitive values only)"""
+    attributes = {'financial_bot.category': span.category}
+    if run_id:
+        attributes['financial_bot.run_id'] = str(run_id)
+    for name, value in span.attributes.items():
+        if value is None or name == 'error':
+            continue
+        key = _SEMANTIC_NAMES.get(name, f'financial_bot.{name}')
+        attributes[key] = value if isinstance(value, (bool, int, float, str)) else str(value)
+    if 'error' in span.attributes:
+        attributes['error.type'] = span.attributes['error'].split(':', 1)[0]
+    return attributes
+
+
+def _ordered(timeline):
+    """The finished spans, parents before children, with orphans re-parented under the root"""
+    root = timeline.root
+    spans = [span for span in timeline.spans if span.end is not None]
+    known = {span.span_id for span in spans}
+    parents = {
+        span.span_id: (span.parent_id if span.parent_id in known else (root.span_id if root else None))
+        for span in spans if span is not root
+    }
+    depth = {}
+
+    def level(span_id):
+        if span_id not in depth:
+            parent = parents.get(span_id)
+            depth[span_id] = 0 if parent is None else level(parent) + 1
+        return depth[span_id]
+
+    return sorted(spans, key=lambda span: (level(span.span_id), span.start)), parents
+
+
+def to_otlp_json(timeline, run_id=None):
+    """One dict per span in the OTLP/JSON span layout, all sharing one trace id"""
+    rng = random.SystemRandom()
+    trace_id = f'{rng.getrandbits(128):032x}'
+    span_ids = {}
+    ordered, parents = _ordered(timeline)
+    records = []
+    for span in ordered:
+        span_ids[span.span_id] = f'{rng.getrandbits(64):016x}'
+        parent = parents.get(span.span_id)
+        records.append({
+            'traceId': trace_id,
+            'spanId': span_ids[span.span_id],
+            'parentSpanId': span_ids.get(parent, ''),
+            'name': span.name,
+            'kind': _SPAN_KINDS.get(span.category, 'INTERNAL'),
+            'startTimeUnixNano': _nanos(span.start),
+            'endTimeUnixNano': _nanos(span.end),
+            'attributes': span_attributes(span, run_id),
+            'status': {'code': 'ERROR', 'message': span.attributes['error']} if 'error' in span.attributes
+                      else {'code': 'OK'},
+            'resource': {'service.name': SERVICE_NAME},
+        })
+    return trace_id, records
+
+
+def export_jsonl(timeline, run_id=None, path=TRACE_FILE):
+    """Append the run's trace to a JSONL file, one span per line; returns the trace id"""
+    trace_id, records = to_otlp_json(timeline, run_id)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as handle:
+        for record in records:
+            handle.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+    return trace_id
+
+
+def export_otlp(timeline, run_id=None, endpoint=OTLP_ENDPOINT):
+    """Replay the run's spans (with their recorded start and end times) through the
+    OpenTelemetry SDK to an OTLP/HTTP collector; returns the trace id"""
+    provider = TracerProvider(resource=Resource.create({'service.name': SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=f"{endpoint.rstrip('/')}/v1/traces")))
+    tracer = provider.get_tracer('financial_bot')
+    ordered, parents = _ordered(timeline)
+    otel_spans = {}
+    for span in ordered:
+        parent = otel_spans.get(parents.get(span.span_id))
+        context = otel_trace.set_span_in_context(parent) if parent is not None else None
+        otel_span = tracer.start_span(
+            span.name, context=context, kind=getattr(otel_trace.SpanKind, _SPAN_KINDS.get(span.category, 'INTERNAL')),
+            attributes=span_attributes(span, run_id), start_time=_nanos(span.start)
+        )
+        if 'error' in span.attributes:
+            otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, span.attributes['error']))
+        otel_spans[span.span_id] = otel_span
+    for span in ordered:
+        otel_spans[span.span_id].end(end_time=_nanos(span.end))
+    provider.shutdown()  # flushes the batch
+    root = otel_spans.get(timeline.root.span_id) if timeline.root else None
+    return f'{root.get_span_context().trace_id:032x}' if root else None
+
+
+def export_trace(timeline, run_id=None, exporter=TRACE_EXPORTER):
+    """Export a finished run as one trace; returns a description of where it went, or None"""
+    if exporter == 'none' or timeline.root is None:
+        return None
+    if exporter == 'otlp':
+        if OTEL_AVAILABLE:
+            return f'trace {export_otlp(timeline, run_id)} sent to {OTLP_ENDPOINT}'
+        logger.warning("TRACE_EXPORTER=otlp needs opentelemetry-sdk and opentelemetry-exporter-otlp-proto-http; "
+                       "writing the trace to the JSONL file instead")
+    return f'trace {export_jsonl(timeline, run_id)} appended to {TRACE_FILE}'
@@ -0,0 +1,267 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+TRANSLATION_MEMORY_DB = os.getenv('TRANSLATION_MEMORY_DB', os.path.join('state', 'translation_memory.db'))
+# Entries unused for this long are not reused (terminology and style drift over time)
+TRANSLATION_MEMORY_TTL = float(os.getenv('TRANSLATION_MEMORY_TTL', str(30 * 24 * 3600)))
+# Least recently used entries beyond this are evicted; 0 disables the memory
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv('TRANSLATION_MEMORY_MAX_ENTRIES', '5000'))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS translation_memory (
+    language TEXT NOT NULL,
+    key TEXT NOT NULL,
+    source TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (language, key)
+)
+"""
+
+_LINE = re.compile(r'[^\n]+|\n+')
+_DECORATION = re.compile(r'^[ \t]*(?:(?:[-*•>]|#{1,6}|\d+[.)])[ \t]+)?')
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?])[ \t]+(?=["“(\[*]?[A-Z0-9])')
+_ABBREVIATION = re.compile(r'(?:\b[A-Z]\.){1,3}$|\b(?:Mr|Mrs|Ms|Dr|vs|Inc|Corp|Co|Ltd|St|No|Jan|Feb|Mar|Apr|Jun|Jul|'
+                           r'Aug|Sep|Sept|Oct|Nov|Dec)\.$')
+_NUMBER = re.compile(r'[+\-−]?\d[\d,]*(?:\.\d+)?')
+_PLACEHOLDER = re.compile(r'⟦(\d+)⟧')
+_LETTER = re.compile(r'[^\W\d_]')
+_LAYOUT = re.compile(r'^[ \t]*(?:[-*•>]|#{1,6}|\d+[.)])[ \t]+')
+_HEADING = re.compile(r'^[ \t]*(?:#{1,6}[ \t]|(?:\*\*|__).*(?:\*\*|__)[ \t]*$)|:[ \t]*$')
+
+
+def _is_heading(line):
+    """Markdown headings, fully bold lines, lines ending in ':' and ALL-CAPS titles such as
+    "📈 MARKET OVERVIEW (120 words)"
+    """
+    if _HEADING.search(line):
+        return True
+    letters = ''.join(_LETTER.findall(line.split('(', 1)[0]))
+    return letters.isupper()
+
+
+def join_soft_breaks(text):
+    """Join the lines of a hard-wrapped paragraph, so a sentence the analyst wrapped over two
+    lines stays one segment; blank lines, bullets, numbered items, quotes and headings remain
+    line breaks"""
+    lines = text.split('\n')
+    joined = lines[:1]
+    for line in lines[1:]:
+        previous = joined[-1]
+        if (previous.strip() and line.strip() and not _LAYOUT.match(line)
+                and not _is_heading(previous) and not _is_heading(line)):
+            joined[-1] = f'{previous.rstrip()} {line.lstrip()}'
+        else:
+            joined.append(line)
+    return '\n'.join(joined)
+
+
+def split_segments(line):
+    """Split one line into sentences, without breaking after abbreviations like "U.S." or "Inc." """
+    segments, start = [], 0
+    for match in _SENTENCE_BREAK.finditer(line):
+        if _ABBREVIATION.search(line[start:match.start()]):
+            continue
+        segments.append((line[start:match.start()], match.group(0)))
+        start = match.end()
+    segments.append((line[start:], ''))
+    return segments
+
+
+def segment_key(source):
+    """Normalised lookup key: case-folded, whitespace collapsed, every number replaced by '#',
+    so "S&P 500 rose 0.85% to 5,648.40" and "S&P 500 rose 1.2% to 5,701.10" share a key"""
+    return _NUMBER.sub('#', ' '.join(source.split())).casefold()
+
+
+def to_template(source, translation):
+    """Replace the source's numbers in a translation by ⟦i⟧ placeholders; None if a number
+    did not survive translation verbatim (the entry could not be reused safely)"""
+    unused = {}
+    for index, number in enumerate(_NUMBER.findall(source)):
+        unused.setdefault(number, []).append(index)
+
+    def placeholder(match):
+        indexes = unused.get(match.group(0))
+        return f'⟦{indexes.pop(0)}⟧' if indexes else match.group(0)
+
+    template = _NUMBER.sub(placeholder, translation)
+    return None if any(unused.values()) else template
+
+
+def from_template(template, source):
+    """Fill a stored template with the numbers of a new source segment"""
+    numbers = _NUMBER.findall(source)
+    return _PLACEHOLDER.sub(lambda m: numbers[int(m.group(1))] if int(m.group(1)) < len(numbers) else m.group(0),
+                            template)
+
+
+class TranslationPlan:
+    """A text cut into segments for one language: which come from the memory, which still
+    need the LLM, and how to stitch the translation back together with the original layout"""
+
+    def __init__(self, language, parts, sources):
+        self.language = language
+        self.parts = parts        # layout: literal strings (whitespace, bullets) and segment indexes
+        self.sources = sources    # segment index -> English source
+        self.cached = {}          # segment index -> translation reused from the memory
+
+    @property
+    def missing(self):
+        """Segments the LLM still has to translate, {id: source} with string ids"""
+        return {str(index): source for index, source in enumerate(self.sources) if index not in self.cached}
+
+    def prompt(self):
+        """The missing segments as the JSON object the translation task works on"""
+        return json.dumps(self.missing, ensure_ascii=False, indent=0)
+
+    def assemble(self, translated):
+        """Full translation from cached segments plus {id: translation} from the LLM; segments
+        that are still missing keep their English source so the layout stays intact"""
+        pieces = []
+        for part in self.parts:
+            if isinstance(part, str):
+                pieces.append(part)
+            else:
+                pieces.append(self.cached.get(part) or translated.get(str(part)) or self.sources[part])
+        return ''.join(pieces)
+
+    def summary(self):
+        total = len(self.sources)
+        reused = sum(len(self.sources[index]) for index in self.cached)
+        characters = sum(len(source) for source in self.sources) or 1
+        return (f'{self.language}: {len(self.cached)}/{total} segments from translation memory '
+                f'({reused / characters:.0%} of the text)')
+
+
+class TranslationMemory:
+    """Segment-level translation memory in SQLite (WAL) keyed on (language, normalised segment).
+
+    Lookups skip entries not used within the TTL; each store evicts the least recently used
+    entries beyond max_entries. Numbers are kept as placeholders, so a recurring sentence
+    is reused even when the figures in it change from one report to the next.
+    """
+
+    def __init__(self, path=TRANSLATION_MEMORY_DB, ttl=TRANSLATION_MEMORY_TTL,
+                 max_entries=TRANSLATION_MEMORY_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connect().execute(_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def plan(self, text, language):
+        """Segment `text` and fill in every segment the memory already knows for `language`.
+
+        Segments without letters (figures, emoji, separators) are copied as they are.
+        """
+        parts, sources = [], []
+        for piece in _LINE.findall(join_soft_breaks(text)):
+            if piece.startswith('\n'):
+                parts.append(piece)
+                continue
+            decoration = _DECORATION.match(piece).group(0)
+            if decoration:
+                parts.append(decoration)
+                piece = piece[len(decoration):]
+            for segment, separator in split_segments(piece):
+                stripped = segment.strip()
+                if not _LETTER.search(stripped):
+                    parts.append(segment + separator)
+                    continue
+                leading = segment[:len(segment) - len(segment.lstrip())]
+                trailing = segment[len(segment.rstrip()):]
+                parts.extend([leading, len(sources), trailing + separator])
+                sources.append(stripped)
+
+        plan = TranslationPlan(language, parts, sources)
+        if not self.enabled or not sources:
+            return plan
+        keys = {}
+        for index, source in enumerate(sources):
+            keys.setdefault(segment_key(source), []).append(index)
+        now = time.time()
+        conn = self._connect()
+        found = []
+        key_list = list(keys)
+        for start in range(0, len(key_list), 500):
+            batch = key_list[start:start + 500]
+            found.extend(conn.execute(
+                f"SELECT key, translation FROM translation_memory WHERE language = ? AND last_used >= ? "
+                f"AND key IN ({', '.join('?' * len(batch))})", [language, now - self.ttl] + batch
+            ).fetchall())
+        for key, template in found:
+            for index in keys[key]:
+                plan.cached[index] = from_template(template, sources[index])
+        if found:
+            conn.executemany(
+                'UPDATE translation_memory SET last_used = ?, hits = hits + 1 WHERE language = ? AND key = ?',
+                [(now, language, key) for key, _ in found]
+            )
+        return plan
+
+    def store(self, language, pairs):
+        """Remember (source, translation) pairs for `language`; returns how many were stored"""
+        if not self.enabled:
+            return 0
+        now = time.time()
+        rows = []
+        for source, translation in pairs:
+            translation = (translation or '').strip()
+            template = to_template(source, translation) if translation else None
+            if template is None:
+                continue
+            rows.append((language, segment_key(source), source, template, now, now))
+        if not rows:
+            return 0
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT INTO translation_memory (language, key, source, translation, created_at, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (language, key) DO UPDATE SET '
+                'source = excluded.source, translation = excluded.translation, last_used = excluded.last_used',
+                rows
+            )
+            conn.execute('DELETE FROM translation_memory WHERE last_used < ?', (now - self.ttl,))
+            conn.execute(
+                'DELETE FROM translation_memory WHERE rowid IN (SELECT rowid FROM translation_memory '
+                'ORDER BY last_used DESC LIMIT -1 OFFSET ?)', (self.max_entries,)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return len(rows)
+
+    def learn(self, plan, translated):
+        """Store the LLM's translations for the segments a plan was missing"""
+        sources = dict(plan.missing)
+        return self.store(plan.language, [
+            (sources[segment_id], text) for segment_id, text in translated.items() if segment_id in sources
+        ])
@@ -0,0 +1,153 @@
+import os
+import re
+import json
+import time
+import logging
+from typing import Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+# Target languages of the translation stage (English is the formatted source report)
+TRANSLATION_LANGUAGES = ['Arabic', 'Hindi', 'Hebrew']
+# Languages translated at the same time; 0 = as many as the provider's rate-limit burst allows
+TRANSLATION_CONCURRENCY = int(os.getenv('TRANSLATION_CONCURRENCY', '0'))
+
+
+_FENCE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$', re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_SMART_QUOTES = str.maketrans({'“': '"', '”': '"', '„': '"'})
+
+
+def _json_object(text):
+    """The outermost {...} of a model reply (code fences and surrounding prose dropped)"""
+    text = _FENCE.sub('', text)
+    start, end = text.find('{'), text.rfind('}')
+    return text[start:end + 1] if start != -1 and end > start else None
+
+
+def _escape_control_characters(candidate):
+    """Escape raw newlines / tabs that models leave inside JSON strings"""
+    repaired, in_string, escaped = [], False, False
+    for char in candidate:
+        if in_string and not escaped and char in '\n\r\t':
+            char = {'\n': '\\n', '\r': '\\r', '\t': '\\t'}[char]
+        elif char == '"' and not escaped:
+            in_string = not in_string
+        escaped = char == '\\' and not escaped
+        repaired.append(char)
+    return ''.join(repaired)
+
+
+def _repair_json(candidate):
+    """Fix the mistakes models make most often: smart quotes, trailing commas, raw newlines"""
+    candidate = candidate.translate(_SMART_QUOTES)
+    candidate = _TRAILING_COMMA.sub(r'\1', candidate)
+    return _escape_control_characters(candidate)
+
+
+def _json_candidates(text):
+    """Yield what json.loads() makes of the reply, its embedded object and the repaired object"""
+    candidate = _json_object(text)
+    for attempt in (text, candidate, candidate and _repair_json(candidate)):
+        if not attempt:
+            continue
+        try:
+            yield json.loads(attempt)
+        except ValueError:
+            continue
+
+
+class SegmentTranslations(BaseModel):
+    """Schema of a per-language translation task's structured output: segment id -> translation"""
+
+    language: str = Field(description='Name of the target language in English')
+    segments: Dict[str, str] = Field(description='Translation of every segment, keyed by the segment id')
+
+
+_NUMBERED_LINE = re.compile(r'^[ \t]*(?:\[(\d+)\]|"?(\d+)"?[.):])[ \t]*"?(.*?)"?,?[ \t]*$', re.MULTILINE)
+
+
+def parse_segment_translations(text, ids):
+    """{id: translation} for the requested segment ids from a translation reply.
+
+    Accepts SegmentTranslations JSON, a bare {"<id>": ...} object (both with the usual JSON
+    repairs) or, failing that, one "<id>. translation" / "[<id>] translation" per line.
+    Ids the reply does not cover are left out.
+    """
+    if not text:
+        return {}
+    ids = set(ids)
+    for data in _json_candidates(text):
+        if isinstance(data, dict) and isinstance(data.get('segments'), dict):
+            data = data['segments']
+        if isinstance(data, dict):
+            found = {str(key): value.strip() for key, value in data.items()
+                     if str(key) in ids and isinstance(value, str) and value.strip()}
+            if found:
+                return found
+    return {
+        match.group(1) or match.group(2): match.group(3).strip()
+        for match in _NUMBERED_LINE.finditer(text)
+        if (match.group(1) or match.group(2)) in ids and match.group(3).strip()
+    }
+
+
+def segment_translations_from_output(output, ids):
+    """{id: translation} from a per-language CrewAI TaskOutput"""
+    structured = getattr(output, 'pydantic', None)
+    if isinstance(structured, SegmentTranslations):
+        return {key: value.strip() for key, value in structured.segments.items() if key in set(ids) and value.strip()}
+    return parse_segment_translations(getattr(output, 'raw', output), ids)
+
+
+class TranslationResult:
+    """Outcome of one language's translation, timed from the start of the translation stage"""
+
+    def __init__(self, language, text=None, error=None, started=0.0, finished=0.0, stage_started=0.0):
+        self.language = language
+        self.text = text
+        self.error = error
+        self.latency = finished - started            # this language's own run time
+        self.available_after = finished - stage_started  # when it was ready to publish
+
+    @property
+    def ok(self):
+        return self.error is None and bool(self.text)
+
+    def __str__(self):
+        status = 'ok' if self.ok else f'failed: {str(self.error)[:100] if self.error else "empty"}'
+        return f'{self.language}: {status} in {self.latency:.1f}s (ready after {self.available_after:.1f}s)'
+
+
+def translate_concurrently(translate, languages=TRANSLATION_LANGUAGES, max_workers=None, on_result=None):
+    """Run translate(language) -> text for every language on a bounded thread pool.
+
+    on_result(TranslationResult) is called on the calling thread as each language finishes,
+    so it can be published while the slower ones are still running. Returns the results in
+    completion order. A failing language does not affect the others.
+    """
+    stage_started = time.perf_counter()
+
+    def run(language):
+        started = time.perf_counter()
+        try:
+            return TranslationResult(language, text=translate(language), started=started,
+                                     finished=time.perf_counter(), stage_started=stage_started)
+        except Exception as e:
+            logger.warning(f'{language} translation failed: {e}')
+            return TranslationResult(language, error=e, started=started,
+                                     finished=time.perf_counter(), stage_started=stage_started)
+
+    results = []
+    workers = max(1, min(len(languages), max_workers or TRANSLATION_CONCURRENCY or len(languages)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='translate') as pool:
+        futures = [pool.submit(run, language) for language in languages]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    return results
@@ -0,0 +1,209 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+USAGE_HISTORY_DB = os.getenv('USAGE_HISTORY_DB', os.path.join('state', 'usage_history.db'))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_usage (
+    run_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    cost REAL,
+    latency REAL,
+    cached INTEGER NOT NULL DEFAULT 0,
+    recorded_at REAL NOT NULL
+)
+"""
+_INDEX = 'CREATE INDEX IF NOT EXISTS llm_usage_run ON llm_usage (run_id, stage)'
+
+UNATTRIBUTED = 'unattributed'
+
+
+class UsageRecord:
+    """Tokens, latency and cost of one LiteLLM completion"""
+
+    def __init__(self, stage, model, prompt_tokens, completion_tokens, cost=None, latency=None, cached=False):
+        self.stage = stage
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.cost = cost          # USD from LiteLLM's price map; None if the model is not priced
+        self.latency = latency
+        self.cached = cached      # answered by the LLM cache: no provider tokens were billed
+        self.recorded_at = time.time()
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+
+def response_usage(response):
+    """(prompt_tokens, completion_tokens) reported by a LiteLLM response"""
+    usage = getattr(response, 'usage', None)
+    if usage is None and isinstance(response, dict):
+        usage = response.get('usage')
+    if usage is None:
+        return 0, 0
+    if isinstance(usage, dict):
+        return int(usage.get('prompt_tokens') or 0), int(usage.get('completion_tokens') or 0)
+    return int(getattr(usage, 'prompt_tokens', 0) or 0), int(getattr(usage, 'completion_tokens', 0) or 0)
+
+
+def response_cost(response):
+    """USD cost of a LiteLLM response, or None when LiteLLM has no price for the model"""
+    cost = (getattr(response, '_hidden_params', None) or {}).get('response_cost')
+    if cost is not None:
+        return float(cost)
+    try:
+        import litellm
+
+        return float(litellm.completion_cost(completion_response=response))
+    except Exception:
+        return None
+
+
+class UsageTracker:
+    """Token, latency and cost accounting for every LLM call of a run, grouped by stage.
+
+    A call's stage comes from the `stage` entry of the LiteLLM `metadata` the agent's LLM
+    was created with (one LLM per agent/task). save() appends the run's calls to a SQLite
+    history so stages can be compared across runs.
+    """
+
+    def __init__(self, path=USAGE_HISTORY_DB):
+        self.path = path
+        self.records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(_SCHEMA)
+            conn.execute(_INDEX)
+            self._local.conn = conn
+        return conn
+
+    def record(self, call, response):
+        """llm_hooks completion hook: account one complete response"""
+        prompt_tokens, completion_tokens = response_usage(response)
+        record = UsageRecord(
+            call.metadata.get('stage') or UNATTRIBUTED, call.model, prompt_tokens, completion_tokens,
+            cost=0.0 if call.cache_hit else response_cost(response), latency=call.elapsed, cached=call.cache_hit
+        )
+        with self._lock:
+            self.records.append(record)
+        return record
+
+    def by_stage(self):
+        """{stage: totals} in the order the stages first called the LLM"""
+        stages = {}
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            totals = stages.setdefault(record.stage, {
+                'calls': 0, 'cached_calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0,
+                'cost': 0.0, 'latency': 0.0, 'unpriced_calls': 0
+            })
+            totals['calls'] += 1
+            totals['cached_calls'] += int(record.cached)
+            totals['prompt_tokens'] += record.prompt_tokens
+            totals['completion_tokens'] += record.completion_tokens
+            totals['total_tokens'] += record.total_tokens
+            totals['latency'] += record.latency or 0.0
+            if record.cost is None:
+                totals['unpriced_calls'] += 1
+            else:
+                totals['cost'] += record.cost
+        return stages
+
+    def totals(self):
+        run = {'calls': 0, 'cached_calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0,
+               'cost': 0.0, 'latency': 0.0, 'unpriced_calls': 0}
+        for totals in self.by_stage().values():
+            for name, value in totals.items():
+                run[name] += value
+        return run
+
+    def summary(self):
+        stages = self.by_stage()
+        if not stages:
+            return 'LLM usage: no calls'
+        run = self.totals()
+        lines = [f"LLM usage: {run['calls']} calls, {run['prompt_tokens']:,} prompt + "
+                 f"{run['completion_tokens']:,} completion tokens, ${run['cost']:.4f}"]
+        for stage, totals in sorted(stages.items(), key=lambda item: -item[1]['total_tokens']):
+            share = totals['total_tokens'] / run['total_tokens'] if run['total_tokens'] else 0.0
+            cached = f", {totals['cached_calls']} cached" if totals['cached_calls'] else ''
+            unpriced = ' (unpriced)' if totals['unpriced_calls'] else ''
+            lines.append(f"   {stage}: {totals['calls']} calls{cached}, {totals['prompt_tokens']:,} prompt + "
+                         f"{totals['completion_tokens']:,} completion tokens ({share:.0%}), "
+                         f"${totals['cost']:.4f}{unpriced}, {totals['latency']:.1f}s")
+        return '\n'.join(lines)
+
+    def save(self, run_id):
+        """Append this run's calls to the history; returns how many were written"""
+        with self._lock:
+            records = list(self.records)
+        if not records:
+            return 0
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT INTO llm_usage (run_id, stage, model, prompt_tokens, completion_tokens, cost, latency, '
+                'cached, recorded_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(run_id, r.stage, r.model, r.prompt_tokens, r.completion_tokens, r.cost, r.latency, int(r.cached),
+                  r.recorded_at) for r in records]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return len(records)
+
+    def history(self, runs=10):
+        """Per-stage averages over the last `runs` runs in the history: {stage: averages per run}"""
+        rows = self._connect().execute(
+            'SELECT stage, COUNT(DISTINCT run_id), SUM(prompt_tokens), SUM(completion_tokens), SUM(cost), '
+            'SUM(latency) FROM llm_usage WHERE run_id IN (SELECT run_id FROM llm_usage GROUP BY run_id '
+            'ORDER BY MAX(recorded_at) DESC LIMIT ?) GROUP BY stage', (runs,)
+        ).fetchall()
+        return {
+            stage: {'runs': count, 'prompt_tokens': prompt / count, 'completion_tokens': completion / count,
+                    'cost': (cost or 0.0) / count, 'latency': (latency or 0.0) / count}
+            for stage, count, prompt, completion, cost, latency in rows
+        }
+
+    def history_summary(self, runs=10):
+        history = self.history(runs)
+        if not history:
+            return None
+        lines = [f'LLM usage, average per run over the last {max(h["runs"] for h in history.values())} runs:']
+        for stage, averages in sorted(history.items(), key=lambda item: -item[1]['prompt_tokens']):
+            lines.append(f"   {stage}: {averages['prompt_tokens']:,.0f} prompt + "
+                         f"{averages['completion_tokens']:,.0f} completion tokens, ${averages['cost']:.4f}, "
+                         f"{averages['latency']:.1f}s")
+        return '\n'.join(lines)
+
+
+# Usage of the current process, fed by the llm_hooks completion hook
+usage_tracker = UsageTracker()
+
+
+def record_llm_usage(call, response):
+    """llm_hooks completion hook"""
+    usage_tracker.record(call, response)